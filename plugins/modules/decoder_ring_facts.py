@@ -5,7 +5,7 @@ __metaclass__ = type
 
 DOCUMENTATION = r'''
 ---
-module: decoder_ring
+module: decoder_ring_facts
 
 author:
   - Tim Way (@timway)
@@ -19,14 +19,102 @@ description: >-
   resources in an environment. This module takes in a variety of information
   deemed relavent to our fictional environment to deterministically provide
   the same name for that set of inputs reliably.
+
+options:
+  api_key:
+    description:
+      - Geoapify API key used to look up the timezone of a building.
+      - Falls back to the C(DMW_DECODER_API_KEY) environment variable.
+    type: str
+    required: true
+  cache:
+    description:
+      - SQLite file that keeps geocoding results between module runs.
+      - Forks sharing the file wait for each other instead of looking up
+        the same building twice.
+      - Falls back to the C(DMW_DECODER_CACHE) environment variable.
+    type: path
+  building_id:
+    description:
+      - Numeric ID of the building in the site CSV.
+      - Required together with I(device_function), I(entity) and
+        I(component). Mutually exclusive with I(items).
+    type: str
+  device_function:
+    description: One of server, network, virtualized, app or other.
+    type: str
+  entity:
+    description: Three to seven character name of the entity.
+    type: str
+  component:
+    description: Component suffix, truncated to fit 15 characters.
+    type: str
+  items:
+    description:
+      - Name many resources in one module run. Results are returned in
+        C(dmw_decoder_hostnames), keyed by I(key).
+      - Mutually exclusive with I(building_id).
+    type: list
+    elements: dict
+    suboptions:
+      key:
+        description:
+          - Key of this item in C(dmw_decoder_hostnames).
+          - Defaults to C(item<index>), e.g. C(item0). Keys must be unique.
+        type: str
+      building_id:
+        description: Numeric ID of the building in the site CSV.
+        type: str
+        required: true
+      device_function:
+        description: One of server, network, virtualized, app or other.
+        type: str
+        required: true
+      entity:
+        description: Three to seven character name of the entity.
+        type: str
+        required: true
+      component:
+        description: Component suffix, truncated to fit 15 characters.
+        type: str
+        required: true
 '''
 
 EXAMPLES = r'''
 - name: Determine the name for a resource
-  chipy.decoder_ring.decoder_ring:
-    building_id: building01
+  chipy.decoder_ring.decoder_ring_facts:
+    building_id: "1"
+    device_function: server
+    entity: web
+    component: "-01"
+
+- name: Determine the names for many resources in one module run
+  chipy.decoder_ring.decoder_ring_facts:
+    items:
+      - key: web01
+        building_id: "1"
+        device_function: server
+        entity: web
+        component: "-01"
+      - key: csr01
+        building_id: "2"
+        device_function: virtualized
+        entity: csr
+        component: -01-temp
+  run_once: true
+
+- name: Share geocoding results between forks and hosts
+  chipy.decoder_ring.decoder_ring_facts:
+    building_id: "1"
+    device_function: server
+    entity: web
+    component: "-01"
+    cache: /tmp/dmw_decoder_cache.sqlite
+  delegate_to: localhost
 '''
 
+from collections import Counter
+
 import dmw_decoder
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.common.parameters import env_fallback
@@ -36,10 +124,22 @@ def run_module():
     # define available arguments/parameters a user can pass to the module
     module_args = dict(
         api_key=dict(type='str', fallback=(env_fallback, ['DMW_DECODER_API_KEY']), required=True),
-        building_id=dict(type='str', required=True),
-	component=dict(type='str', required=True),
-	device_function=dict(type='str', required=True),
-	entity=dict(type='str', required=True),
+        cache=dict(type='path', fallback=(env_fallback, ['DMW_DECODER_CACHE'])),
+        building_id=dict(type='str'),
+        component=dict(type='str'),
+        device_function=dict(type='str'),
+        entity=dict(type='str'),
+        items=dict(
+            type='list',
+            elements='dict',
+            options=dict(
+                key=dict(type='str'),
+                building_id=dict(type='str', required=True),
+                component=dict(type='str', required=True),
+                device_function=dict(type='str', required=True),
+                entity=dict(type='str', required=True),
+            ),
+        ),
     )
     
     # the AnsibleModule object will be our abstraction working with Ansible
@@ -48,12 +148,52 @@ def run_module():
     # supports check mode
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[('building_id', 'items')],
+        required_one_of=[('building_id', 'items')],
+        required_together=[('building_id', 'component', 'device_function', 'entity')],
         supports_check_mode=True
     )
 
+    # Every fork is a separate process, so results are only shared through
+    # a cache file. Concurrent forks wait for whichever one is already
+    # geocoding a building instead of repeating the lookup.
+    cache = None
+    if module.params['cache'] is not None:
+        cache = dmw_decoder.GeocodeCache(module.params['cache'])
+
     decoder = dmw_decoder.Decoder(
-        api_key=module.params['api_key']
+        api_key=module.params['api_key'],
+        cache=cache,
     )
+
+    if module.params['items'] is not None:
+        # One decoder names the whole batch so each building is only
+        # geocoded once per module run
+        items = module.params['items']
+        keys = [
+            item['key'] if item['key'] is not None else 'item%d' % index
+            for index, item in enumerate(items)
+        ]
+        duplicates = sorted(key for key, count in Counter(keys).items() if count > 1)
+        if duplicates:
+            module.fail_json(msg='Item keys must be unique', duplicate_keys=duplicates)
+        results = decoder.create_names(items)
+        failed = dict(
+            (key, str(result.error))
+            for key, result in zip(keys, results) if not result.ok
+        )
+        if failed:
+            module.fail_json(msg='Unable to name some items', failed_items=failed)
+        result = dict(
+            ansible_facts=dict(
+                dmw_decoder_hostnames=dict(
+                    (key, result.name) for key, result in zip(keys, results)
+                )
+            ),
+            changed=False,
+        )
+        module.exit_json(**result)
+
     dmw_decoder_hostname = decoder.create_netbios_compatible_name(
         module.params["building_id"],
         module.params["device_function"],
@@ -0,0 +1,205 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+from importlib.metadata import version
+
+import httpx
+
+import dmw_decoder
+
+'''
+Benchmarks for the naming pipeline. Geocoding is served by an in-process
+httpx.MockTransport so results measure our own code, not the network.
+Results are written as JSON so runs from different releases can be
+compared with --compare.
+'''
+
+GEO_RESPONSE = {
+    "results": [
+        {"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}
+    ]
+}
+
+
+def mock_client() -> httpx.Client:
+    return httpx.Client(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json=GEO_RESPONSE))
+    )
+
+
+def write_site_csv(directory: str, rows: int, id_width: int = 2) -> str:
+    path = os.path.join(directory, f"sites_{rows}_{id_width}.csv")
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Building Name", "Building ID", "Address"])
+        for i in range(rows):
+            # With the default two digit IDs larger files repeat IDs;
+            # parsing cost still grows with the row count
+            building_id = str(i % 10**id_width)
+            writer.writerow([f"Site {i}", building_id, f"{i} W Adams St, Chicago, IL 60661"])
+    return path
+
+
+def measure(name: str, func, repeat: int, number: int = 0, **extra) -> dict:
+    timer = timeit.Timer(func)
+    if not number:
+        number, _ = timer.autorange()
+    timings = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    result = {
+        "name": name,
+        "iterations": number,
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.mean(timings),
+        "ops_per_s": 1 / min(timings),
+    }
+    result.update(extra)
+    print(f"{name:45} {result['median_s'] * 1e6:12.2f} us", file=sys.stderr)
+    return result
+
+
+def run(quick: bool = False) -> list:
+    repeat = 3 if quick else 5
+    csv_sizes = [10, 1000] if quick else [10, 1000, 100000]
+    bulk_size = 1000 if quick else 10000
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = mock_client()
+        site_csv = write_site_csv(directory, 10)
+        decoder = dmw_decoder.Decoder(api_key="key", site_csv=site_csv, client=client)
+
+        results.append(
+            measure(
+                "create_netbios_compatible_name",
+                lambda: decoder.create_netbios_compatible_name("1", "server", "web", "-01"),
+                repeat,
+            )
+        )
+        warm = dmw_decoder.Decoder(api_key="key", site_csv=site_csv, client=client)
+        warm.warm_up()
+        results.append(
+            measure(
+                "warm_create_netbios_compatible_name",
+                lambda: warm.create_netbios_compatible_name("1", "server", "web", "-01"),
+                repeat,
+            )
+        )
+
+        for rows in csv_sizes:
+            # Unique wide IDs: a full load against the mmap index, which is
+            # built once here so the timings cover a warm start
+            wide_path = write_site_csv(directory, rows, id_width=6)
+            wide = dmw_decoder.Decoder(api_key="key", site_csv=wide_path, id_width=6)
+            indexed = dmw_decoder.Decoder(
+                api_key="key", site_csv=wide_path, id_width=6, indexed_sites=True
+            )
+            indexed._load_sites()
+            results.append(
+                measure(f"load_sites[{rows}]", wide._load_sites, repeat, rows=rows)
+            )
+            results.append(
+                measure(f"indexed_sites[{rows}]", indexed._load_sites, repeat, rows=rows)
+            )
+            middle = f"{rows // 2:06}"
+            # What each name pays for its address: a stat of the CSV, then a
+            # dict lookup in the loaded sites
+            results.append(
+                measure(
+                    f"registry_lookup[{rows}]",
+                    lambda: wide.registry.sites()[middle].address,
+                    repeat,
+                )
+            )
+            sites = indexed._load_sites()
+            results.append(
+                measure(f"indexed_lookup[{rows}]", lambda: sites[middle].address, repeat)
+            )
+
+        results.append(
+            measure("normalize_building_id", lambda: decoder.normalize_building_id("7"), repeat)
+        )
+        results.append(
+            measure(
+                "format_device_function",
+                lambda: decoder.format_device_function(" Virtualized "),
+                repeat,
+            )
+        )
+        results.append(
+            measure(
+                "netbios_compatibility_check",
+                lambda: decoder.netbios_compatibility_check("01sCSTweb-01"),
+                repeat,
+            )
+        )
+        results.append(
+            measure(
+                "truncate_component",
+                lambda: decoder.truncate_component("01-temp-fl2-goofy", "01sCSTweb"),
+                repeat,
+            )
+        )
+
+        requests = [
+            (str(i % 10), "server", "web", f"-{i:05}") for i in range(bulk_size)
+        ]
+        bulk = measure(
+            f"create_names[{bulk_size}]",
+            lambda: decoder.create_names(requests),
+            repeat,
+            number=1,
+            items=bulk_size,
+        )
+        bulk["items_per_s"] = bulk_size / bulk["min_s"]
+        results.append(bulk)
+        client.close()
+    return results
+
+
+def compare(current: list, previous_path: str) -> None:
+    with open(previous_path) as file:
+        previous = {result["name"]: result for result in json.load(file)["results"]}
+    for result in current:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        print(f"{result['name']:45} {ratio:8.2f}x", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the naming pipeline")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, fewer repeats")
+    args = parser.parse_args(argv)
+
+    results = run(quick=args.quick)
+    report = {
+        "package_version": version("dmw_decoder"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from importlib.metadata import version
+
+'''
+Startup benchmark. Every Ansible fork of decoder_ring_facts starts a new
+interpreter and imports dmw_decoder, so import time is paid per host.
+Each case runs in a fresh interpreter and the bare interpreter startup
+is reported alongside so it can be subtracted.
+'''
+
+CASES = {
+    "interpreter": "pass",
+    "import dmw_decoder": "import dmw_decoder",
+    "construct Decoder": "import dmw_decoder; dmw_decoder.Decoder(api_key='')",
+    "name offline": (
+        "import dmw_decoder; "
+        "dmw_decoder.Decoder(api_key='', geocoder='local')"
+        ".create_netbios_compatible_name('1', 'server', 'web', '-01')"
+    ),
+}
+
+CHECK_MODULES = "import sys, dmw_decoder; print(','.join(m for m in ('httpx', 'asyncio') if m in sys.modules))"
+
+
+def time_case(code: str, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(repeat: int) -> list:
+    results = []
+    baseline = None
+    for name, code in CASES.items():
+        timings = time_case(code, repeat)
+        median = statistics.median(timings)
+        if baseline is None:
+            baseline = median
+        results.append(
+            {
+                "name": name,
+                "repeat": repeat,
+                "min_s": min(timings),
+                "median_s": median,
+                "mean_s": statistics.mean(timings),
+                "over_interpreter_s": median - baseline,
+            }
+        )
+        print(f"{name:25} {median * 1000:10.2f} ms", file=sys.stderr)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dmw_decoder startup")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--max-import-ms",
+        type=float,
+        help="exit non-zero if importing adds more than this over a bare interpreter",
+    )
+    args = parser.parse_args(argv)
+
+    eager = subprocess.run(
+        [sys.executable, "-c", CHECK_MODULES], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    results = run(args.repeat)
+    report = {
+        "package_version": version("dmw_decoder"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "eager_imports": eager.split(",") if eager else [],
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    failed = False
+    if report["eager_imports"]:
+        print(f"Imported eagerly: {eager}", file=sys.stderr)
+        failed = True
+    if args.max_import_ms is not None:
+        import_ms = results[1]["over_interpreter_s"] * 1000
+        if import_ms > args.max_import_ms:
+            print(f"Import took {import_ms:.1f} ms", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
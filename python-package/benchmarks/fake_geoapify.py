@@ -0,0 +1,272 @@
+import argparse
+import gzip
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from dmw_decoder.geocoders import LocalGeocoder
+from dmw_decoder.logic import BATCH_PATH, SEARCH_PATH
+from dmw_decoder.ratelimit import TokenBucket
+
+'''
+Local stand-in for the geoapify geocoding API, for load tests and for
+trying concurrency settings without spending real quota. It lives with
+the benchmarks rather than in the package, so installs do not carry it. Responses have
+the shape Decoder reads (results[].timezone.abbreviation_STD and
+results[].rank.confidence) along with the usual metadata, with the
+timezone worked out by LocalGeocoder from the address text.
+
+The batch endpoint takes a POSTed JSON list of addresses and answers 202
+with a job ID. Polling the job returns 202 until batch_delay seconds
+have passed, then 200 with one result per address, in order.
+'''
+
+DEFAULT_LIMIT = 5
+# Like the real API, only bodies larger than this are gzipped
+GZIP_MIN_SIZE = 256
+
+
+class FakeGeoapify:
+    # latency is the base delay per request in seconds, plus up to jitter
+    # more. error_rate is the share of requests answered with a 500.
+    # rate_limit (requests per second) makes requests over the limit get
+    # a 429 with Retry-After. confidence overrides the confidence of the
+    # first result. seed makes the random choices repeatable. batch_delay
+    # is how long a batch job stays pending.
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        confidence: Optional[float] = None,
+        seed: Optional[int] = None,
+        batch_delay: float = 0.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.confidence = confidence
+        self.limiter = None if rate_limit is None else TokenBucket(rate_limit, burst=max(1, int(rate_limit)))
+        self.geocoder = LocalGeocoder()
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.bytes_sent = 0
+        self.status_counts = {}
+        self.batch_delay = batch_delay
+        # Job ID -> (time it is done, addresses)
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.server = ThreadingHTTPServer((host, port), self.handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this
+            # keep-alive connections stall on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self.reply(*fake.respond(self.path, self.headers.get("Accept-Encoding", "")))
+
+            def do_POST(self):
+                request_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.reply(
+                    *fake.respond(
+                        self.path, self.headers.get("Accept-Encoding", ""), request_body
+                    )
+                )
+
+            def reply(self, status, headers, body):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def respond(
+        self, path: str, accept_encoding: str = "", request_body: Optional[bytes] = None
+    ) -> tuple:
+        status, headers, body = self.answer(path, request_body)
+        if "gzip" in accept_encoding and len(body) > GZIP_MIN_SIZE:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        with self._lock:
+            self.bytes_sent += len(body)
+        return status, headers, body
+
+    def answer(self, path: str, request_body: Optional[bytes] = None) -> tuple:
+        # Returns (status, headers, body). request_body is only set for POST.
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            failed = self.random.random() < self.error_rate
+        url = urlsplit(path)
+        if delay > 0:
+            time.sleep(delay)
+        if url.path not in (SEARCH_PATH, BATCH_PATH):
+            return self.finish(404, {"error": "Not Found"})
+        if self.limiter is not None and not self.limiter.try_acquire():
+            return self.finish(429, {"error": "Too Many Requests"}, {"Retry-After": "1"})
+        if failed:
+            return self.finish(500, {"error": "Internal Server Error"})
+        query = parse_qs(url.query)
+        if url.path == BATCH_PATH:
+            if request_body is not None:
+                return self.submit(request_body)
+            return self.job(query.get("id", [""])[0])
+        text = query.get("text", [""])[0]
+        if not text:
+            return self.finish(400, {"error": "Bad Request", "message": "text is required"})
+        limit = int(query.get("limit", [DEFAULT_LIMIT])[0])
+        return self.finish(200, self.search(text, limit))
+
+    def finish(self, status: int, payload, headers: Optional[dict] = None) -> tuple:
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        return status, headers, json.dumps(payload).encode()
+
+    def submit(self, request_body: bytes) -> tuple:
+        try:
+            addresses = json.loads(request_body)
+        except ValueError:
+            addresses = None
+        if not isinstance(addresses, list) or not all(isinstance(a, str) for a in addresses):
+            return self.finish(400, {"error": "Bad Request", "message": "expected a list of addresses"})
+        with self._lock:
+            job_id = f"job{len(self.jobs) + 1}"
+            self.jobs[job_id] = (time.monotonic() + self.batch_delay, addresses)
+        return self.finish(202, {"id": job_id, "status": "pending"})
+
+    def job(self, job_id: str) -> tuple:
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return self.finish(404, {"error": "Not Found", "message": f"no job {job_id!r}"})
+        done_at, addresses = job
+        if time.monotonic() < done_at:
+            return self.finish(202, {"id": job_id, "status": "pending"})
+        results = []
+        for text in addresses:
+            found = self.search(text, 1)["results"]
+            # Like the real API, every result echoes its query
+            results.append({**(found[0] if found else {}), "query": {"text": text}})
+        return self.finish(200, results)
+
+    def search(self, text: str, limit: int) -> dict:
+        found = self.geocoder.lookup(text)
+        if found is None:
+            return {"results": [], "query": {"text": text}}
+        confidence = found.confidence if self.confidence is None else self.confidence
+        results = []
+        for rank in range(limit):
+            # Further candidates are the same place with less confidence
+            results.append(
+                {
+                    "datasource": {"sourcename": "fake", "license": "none"},
+                    "country_code": "xx",
+                    "formatted": text,
+                    "address_line1": text.split(",")[0],
+                    "lat": 41.8786 + rank,
+                    "lon": -87.6403 - rank,
+                    "result_type": "building",
+                    "timezone": {
+                        "name": "Etc/Unknown",
+                        "offset_STD": "+00:00",
+                        "offset_STD_seconds": 0,
+                        "offset_DST": "+00:00",
+                        "offset_DST_seconds": 0,
+                        "abbreviation_STD": found.timezone,
+                        "abbreviation_DST": found.timezone,
+                    },
+                    "rank": {
+                        "importance": 0.5,
+                        "popularity": 5.0,
+                        "confidence": round(confidence / (rank + 1), 4),
+                        "match_type": "full_match",
+                    },
+                    "place_id": f"{zlib.crc32(f'{text}/{rank}'.encode()):08x}",
+                }
+            )
+        return {"results": results, "query": {"text": text}}
+
+    def start(self) -> "FakeGeoapify":
+        # A short poll interval keeps stop() quick
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the geoapify API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share answered with 500")
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second")
+    parser.add_argument("--confidence", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="seconds a batch job pends")
+    args = parser.parse_args(argv)
+    fake = FakeGeoapify(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        confidence=args.confidence,
+        seed=args.seed,
+        batch_delay=args.batch_delay,
+    )
+    print(f"Serving on {fake.url}", file=sys.stderr)
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import version
+
+import dmw_decoder
+from dmw_decoder.geocoders import REGION_TIMEZONES
+from dmw_decoder.resilience import RetryPolicy
+from fake_geoapify import FakeGeoapify
+
+'''
+Load test. Pushes bulk naming through a Decoder pointed at a local
+geoapify stand-in (started in process unless --url is given) and reports
+naming throughput plus HTTP latency percentiles, so concurrency, rate
+limit and retry settings can be sized without real API traffic.
+'''
+
+STATES = sorted(state for country, state in REGION_TIMEZONES if country == "US")
+
+
+class RecordingDecoder(dmw_decoder.Decoder):
+    # Keeps every HTTP latency so percentiles can be reported
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self.statuses = {}
+        self._record_lock = threading.Lock()
+
+    def observe_response(self, response, seconds: float) -> None:
+        super().observe_response(response, seconds)
+        with self._record_lock:
+            self.latencies.append(seconds)
+            self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+
+
+def write_site_csv(directory: str, buildings: int) -> str:
+    # Building IDs are 1..N, each in its own (US) address
+    path = os.path.join(directory, f"load_sites_{buildings}.csv")
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Building Name", "Building ID", "Address"])
+        for i in range(buildings):
+            state = STATES[i % len(STATES)]
+            writer.writerow([f"Site {i}", str(i), f"{i} Main St, Springfield, {state} {i:05}"])
+    return path
+
+
+def percentiles(values: list) -> dict:
+    if len(values) < 2:
+        return {}
+    cut_points = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50_s": cut_points[49],
+        "p90_s": cut_points[89],
+        "p99_s": cut_points[98],
+        "max_s": max(values),
+    }
+
+
+def naming_requests(count: int, buildings: int) -> list:
+    return [(str(i % buildings), "server", "web", f"-{i:05}") for i in range(count)]
+
+
+def run_single(decoder, requests: list, concurrency: int) -> tuple:
+    # Every name is its own create_netbios_compatible_name call, as when
+    # each Ansible fork names one host
+    latencies = []
+
+    def name(request):
+        start = time.perf_counter()
+        try:
+            decoder.create_netbios_compatible_name(*request)
+            ok = True
+        except Exception:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        return ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(name, requests))
+    return results.count(False), latencies
+
+
+def run_batch(decoder, requests: list, chunk_size: int) -> tuple:
+    failures = 0
+    latencies = []
+    for start in range(0, len(requests), chunk_size):
+        chunk_start = time.perf_counter()
+        results = decoder.create_names(requests[start : start + chunk_size])
+        latencies.append(time.perf_counter() - chunk_start)
+        failures += sum(1 for result in results if not result.ok)
+    return failures, latencies
+
+
+def run(args, url: str) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        options = dict(
+            api_key="load-test",
+            site_csv=write_site_csv(directory, args.buildings),
+            base_url=url,
+            max_workers=args.workers,
+            id_width=len(str(args.buildings - 1)) if args.buildings > 100 else 2,
+            lean=args.lean,
+        )
+        if args.cache:
+            options["cache"] = dmw_decoder.GeocodeCache()
+        if args.client_rate:
+            options["rate_limiter"] = dmw_decoder.TokenBucket(
+                rate=args.client_rate, burst=max(1, int(args.client_rate))
+            )
+        if args.retries:
+            options["retry"] = RetryPolicy(retries=args.retries, base_delay=0.05)
+        if args.timeout:
+            options["timeout"] = args.timeout
+        decoder = RecordingDecoder(**options)
+        requests = naming_requests(args.requests, args.buildings)
+        with decoder:
+            decoder.registry.sites()
+            start = time.perf_counter()
+            if args.mode == "single":
+                failures, name_latencies = run_single(decoder, requests, args.workers)
+            else:
+                failures, name_latencies = run_batch(decoder, requests, args.chunk_size)
+            elapsed = time.perf_counter() - start
+    return {
+        "mode": args.mode,
+        "requests": len(requests),
+        "buildings": args.buildings,
+        "workers": args.workers,
+        "failures": failures,
+        "elapsed_s": elapsed,
+        "names_per_s": len(requests) / elapsed,
+        "http_requests": len(decoder.latencies),
+        "http_requests_per_s": len(decoder.latencies) / elapsed,
+        "http_statuses": {str(status): count for status, count in sorted(decoder.statuses.items())},
+        "http_latency": percentiles(decoder.latencies),
+        "name_latency" if args.mode == "single" else "chunk_latency": percentiles(name_latencies),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test naming against a geoapify stand-in")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--url", help="use an already running stand-in instead of starting one")
+    parser.add_argument("--mode", choices=["single", "batch"], default="single")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--buildings", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8, help="threads naming or geocoding")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="batch mode only")
+    parser.add_argument("--cache", action="store_true", help="give the decoder an in-memory cache")
+    parser.add_argument("--client-rate", type=float, help="client side requests per second")
+    parser.add_argument("--retries", type=int, default=0, help="retries for 5xx and timeouts")
+    parser.add_argument("--timeout", type=float, help="per-request timeout in seconds")
+    parser.add_argument("--lean", action="store_true", help="use lean lookups (limit=1)")
+    server = parser.add_argument_group("stand-in server")
+    server.add_argument("--latency", type=float, default=0.02)
+    server.add_argument("--jitter", type=float, default=0.01)
+    server.add_argument("--error-rate", type=float, default=0.0)
+    server.add_argument("--rate-limit", type=float, help="server side requests per second")
+    server.add_argument("--confidence", type=float)
+    server.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.url:
+        results = run(args, args.url)
+    else:
+        with FakeGeoapify(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            confidence=args.confidence,
+            seed=args.seed,
+        ) as fake:
+            results = run(args, fake.url)
+            results["bytes_received"] = fake.bytes_sent
+    report = {
+        "package_version": version("dmw_decoder"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "settings": {
+            key: value for key, value in vars(args).items() if key not in ("output",)
+        },
+        "results": results,
+    }
+    latency = results["http_latency"]
+    print(
+        f"{results['names_per_s']:.0f} names/s, {results['http_requests']} requests, "
+        f"p50 {latency.get('p50_s', 0) * 1000:.1f} ms, "
+        f"p99 {latency.get('p99_s', 0) * 1000:.1f} ms, {results['failures']} failed",
+        file=sys.stderr,
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,24 @@
-from .logic import Decoder
+from .cache import GeocodeCache
+from .geocoders import (
+    ChainedGeocoder,
+    GeoapifyGeocoder,
+    GeocodeResult,
+    Geocoder,
+    LocalGeocoder,
+)
+from .issued import IssuedNames, NameCollisionError
+from .logic import Decoder, NameResult
+from .metrics import Metrics
+from .ratelimit import TokenBucket
+from .registry import SiteRegistry
+from .reverse import NameDecoder, ParsedName
+from .site_index import SiteIndex
+
+
+def __getattr__(name):
+    # AsyncDecoder pulls in asyncio, so only import it when asked for
+    if name == "AsyncDecoder":
+        from .async_decoder import AsyncDecoder
+
+        return AsyncDecoder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,235 @@
+import asyncio
+import importlib.resources
+import pathlib
+import time
+import weakref
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional
+
+from .cache import GeocodeCache
+from .geocoders import GeoapifyGeocoder
+from .logic import BATCH_SIZE, Decoder, NameResult
+from .ratelimit import retry_after_seconds
+from .singleflight import AsyncSingleFlight
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class AsyncDecoder(Decoder):
+    # Same naming rules as Decoder, but every method that may touch the
+    # network is a coroutine backed by httpx.AsyncClient.
+    def __init__(
+        self,
+        api_key: str,
+        site_csv: pathlib.Path = importlib.resources.files("dmw_decoder.data")
+        / "Buildings.csv",
+        client: Optional["httpx.AsyncClient"] = None,
+        max_concurrency: int = 10,
+        **options,
+    ):
+        # Every other option is Decoder's; max_workers has no effect here
+        super().__init__(api_key, site_csv=site_csv, client=client, **options)
+        self.max_concurrency = max_concurrency
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._alookups = AsyncSingleFlight()
+
+    def make_client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        return httpx.AsyncClient(**self.client_options())
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to an event loop, so keep one per loop
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    def geoapify_geocoder(self) -> GeoapifyGeocoder:
+        return GeoapifyGeocoder(afetch=self.geo_lookup_by_address)
+
+    async def geo_lookup_by_address(self, lookup_address: str) -> dict:
+        key = GeocodeCache.normalize_address(lookup_address)
+        geo_data, shared = await self._alookups.do_shared(
+            key, self._fetch_geocode, lookup_address
+        )
+        if shared:
+            self.count("coalesced_lookups")
+        return geo_data
+
+    async def _fetch_geocode(self, lookup_address: str) -> dict:
+        response = await self._request(self.geocode_url(lookup_address))
+        with self.timed("json_parse"):
+            return self.parse_response(response)
+
+    async def _request(self, url: str, send: Optional[Callable] = None) -> "httpx.Response":
+        self.check_circuit()
+        try:
+            response = await self._get_with_retries(url, send)
+        except Exception:
+            self.record_outcome(None)
+            raise
+        self.record_outcome(response.status_code)
+        response.raise_for_status()
+        return response
+
+    async def _get_with_retries(self, url: str, send: Optional[Callable] = None) -> "httpx.Response":
+        if send is None:
+            send = self._send
+        failures = 0
+        rate_limited = 0
+        while True:
+            async with self._semaphore():
+                if self.rate_limiter is not None:
+                    await asyncio.sleep(self.rate_limiter.reserve())
+                start = time.perf_counter()
+                try:
+                    response = await send(url)
+                except Exception as e:
+                    self.count("request_errors")
+                    if not self.should_retry(failures, error=e):
+                        raise
+                    response = None
+                else:
+                    self.observe_response(response, time.perf_counter() - start)
+            if response is None:
+                failures += 1
+                await asyncio.sleep(self.retry.delay(failures))
+            elif response.status_code == 429 and rate_limited < self.rate_limit_retries:
+                rate_limited += 1
+                seconds = retry_after_seconds(response.headers)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.pause(seconds)
+                else:
+                    await asyncio.sleep(seconds)
+            elif self.should_retry(failures, status_code=response.status_code):
+                failures += 1
+                await asyncio.sleep(self.retry.delay(failures))
+            else:
+                return response
+
+    async def _send(self, url: str) -> "httpx.Response":
+        delay = None if self.hedge is None else self.hedge.delay()
+        if delay is None:
+            return await self.client.get(url, **self.request_options())
+        pending = {asyncio.ensure_future(self.client.get(url, **self.request_options()))}
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if not done and self.may_hedge():
+            self.count("hedged_requests")
+            pending.add(asyncio.ensure_future(self.client.get(url, **self.request_options())))
+        try:
+            # The first response wins; an error only counts once both failed
+            while True:
+                if not done:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                task = done.pop()
+                if task.exception() is None or not (done or pending):
+                    return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_timezone_by_address(self, lookup_address: str) -> str:
+        timezone = self.known_timezone(lookup_address)
+        if timezone is not None:
+            return timezone
+        try:
+            with self.timed("geocode"):
+                result = await self.geocoder.alookup(lookup_address)
+        except Exception as e:
+            return self.stale_timezone(lookup_address, e)
+        timezone = self.timezone_from_result(lookup_address, result)
+        if self.cache is not None:
+            self.cache.set(lookup_address, timezone)
+        return timezone
+
+    async def resolve_timezones(self, addresses: Iterable[str]) -> dict:
+        addresses = list(addresses)
+        timezones = await asyncio.gather(
+            *(self.get_timezone_by_address(address) for address in addresses),
+            return_exceptions=True,
+        )
+        return dict(zip(addresses, timezones))
+
+    async def batch_geocode(self, addresses: List[str]) -> list:
+        async def submit(url):
+            return await self.client.post(url, json=addresses, **self.request_options())
+
+        job = (await self._request(self.batch_url(), submit)).json()
+        url = self.batch_url(job["id"])
+        deadline = time.monotonic() + self.batch_timeout
+        while True:
+            response = await self._request(url)
+            if response.status_code != 202:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Batch job {job['id']} did not finish in {self.batch_timeout} seconds"
+                )
+            await asyncio.sleep(self.batch_poll_interval)
+        return self.batch_results(job["id"], addresses, response)
+
+    async def batch_timezones(self, addresses: Iterable[str]) -> dict:
+        timezones, pending = self.unknown_addresses(addresses)
+        for start in range(0, len(pending), BATCH_SIZE):
+            chunk = pending[start : start + BATCH_SIZE]
+            try:
+                with self.timed("geocode"):
+                    results = await self.batch_geocode(chunk)
+            except Exception as e:
+                self.batch_failed(timezones, chunk, e)
+            else:
+                self.batch_succeeded(timezones, chunk, results)
+        return timezones
+
+    async def site_timezones(self, batch: bool = False) -> dict:
+        addresses = self.site_addresses()
+        with self.timed("resolve_timezones"):
+            if batch and isinstance(self.geocoder, GeoapifyGeocoder):
+                timezones = await self.batch_timezones(addresses.values())
+            else:
+                timezones = await self.resolve_timezones(set(addresses.values()))
+        return {building_id: timezones[address] for building_id, address in addresses.items()}
+
+    async def warm_up(self, batch: bool = False) -> int:
+        signature = self.registry.file_signature()
+        return self.set_prefixes(await self.site_timezones(batch), signature)
+
+    async def create_netbios_compatible_name(
+        self, building_id: str, device_function: str, entity: str, component: str
+    ) -> str:
+        name = self.warm_name(building_id, device_function, entity, component)
+        if name is not None:
+            return name
+        sites = self.registry.sites()
+        normal_building_id = self.normalize_building_id(building_id)
+        formatted_device_function = self.format_device_function(device_function)
+        address = self.get_address_by_building_id(sites, building_id)
+        timezone = await self.get_timezone_by_address(address)
+        return self.assemble_name(
+            normal_building_id, formatted_device_function, timezone, entity, component
+        )
+
+    async def create_names(self, requests: Iterable) -> List[NameResult]:
+        prepared, addresses = self._prepare_batch(requests)
+        timezones = await self.resolve_timezones(set(addresses.values()))
+        return self._collect_batch(prepared, addresses, timezones)
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+            self._client = None
+            self._owns_client = False
+
+    def close(self) -> None:
+        # httpx.AsyncClient can only be closed from a coroutine
+        if self._owns_client:
+            raise TypeError("Use 'await decoder.aclose()' or 'async with' to close an AsyncDecoder")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
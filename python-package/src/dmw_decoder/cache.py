@@ -0,0 +1,152 @@
+import contextlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Addresses are hashed onto this many one-byte lock ranges in the lock file
+LOCK_SLOTS = 1 << 16
+
+
+class GeocodeCache:
+    # SQLite keeps the cache usable by several processes at once (Ansible
+    # forks, parallel CLI runs). On top of that, a shared file gets a lock
+    # file with one byte-range lock per address slot (see locked), so the
+    # processes agree on who looks an address up.
+    def __init__(
+        self,
+        path: str = ":memory:",
+        ttl: float = 30 * 24 * 60 * 60,
+        negative_ttl: float = 24 * 60 * 60,
+        max_entries: int = 10000,
+        negative_values: tuple = ("TBD",),
+        clock: Callable[[], float] = time.time,
+        stale_ttl: float = 7 * 24 * 60 * 60,
+    ):
+        self.path = str(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.negative_values = negative_values
+        self.clock = clock
+        # Expired entries are kept this much longer as a last resort for
+        # when the geocoding API is down
+        self.stale_ttl = stale_ttl
+        # A file shared by several processes also gets a lock file, so
+        # they can agree on who looks an address up
+        self.shared = fcntl is not None and self.path != ":memory:"
+        self._lock_fd: Optional[int] = None
+        # lockf locks belong to the process, so threads of this process
+        # take a per-slot thread lock before the byte-range lock
+        self._slot_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "key TEXT PRIMARY KEY, "
+            "timezone TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def normalize_address(address: str) -> str:
+        address = re.sub(r"\s*,\s*", ", ", address.strip().lower())
+        return " ".join(address.split())
+
+    def get(self, address: str, stale: bool = False) -> Optional[str]:
+        key = self.normalize_address(address)
+        now = self.clock()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT timezone, expires_at FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            timezone, expires_at = row
+            if expires_at + self.stale_ttl <= now:
+                self._connection.execute("DELETE FROM geocode WHERE key = ?", (key,))
+                return None
+            if expires_at <= now and not stale:
+                return None
+            self._connection.execute(
+                "UPDATE geocode SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return timezone
+
+    def set(self, address: str, timezone: str) -> None:
+        key = self.normalize_address(address)
+        now = self.clock()
+        # Low confidence answers are cached too, just not for as long
+        if timezone in self.negative_values:
+            expires_at = now + self.negative_ttl
+        else:
+            expires_at = now + self.ttl
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)",
+                (key, timezone, expires_at, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM geocode").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM geocode WHERE key IN "
+                "(SELECT key FROM geocode ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+
+    def locked(self, address: str):
+        # Held around a lookup so that concurrent processes (Ansible forks)
+        # geocode each address once; the others wait and then read the
+        # answer from the cache.
+        if not self.shared:
+            return contextlib.nullcontext()
+        return self._address_lock(zlib.crc32(self.normalize_address(address).encode()))
+
+    @contextlib.contextmanager
+    def _address_lock(self, checksum: int):
+        offset = checksum % LOCK_SLOTS
+        with self._lock:
+            if self._lock_fd is None:
+                self._lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+            slot_lock = self._slot_locks.setdefault(offset, threading.Lock())
+        # Without the thread lock two threads on one slot would both hold
+        # the byte-range lock, and the first to unlock would free it for both
+        with slot_lock:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, offset)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, offset)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM geocode")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM geocode"
+            ).fetchone()
+        return count
+
+    def close(self) -> None:
+        self._connection.close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
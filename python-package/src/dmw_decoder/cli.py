@@ -0,0 +1,296 @@
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import os
+import sys
+from typing import Iterator, Optional
+
+from . import site_index
+from .cache import GeocodeCache
+from .issued import IssuedNames
+from .logic import NAMING_FIELDS, Decoder
+from .reverse import NameDecoder, known_timezones
+from .sharded import ShardedNamer
+
+OUTPUT_FIELDS = NAMING_FIELDS + ("name", "error")
+
+
+def guess_format(path: Optional[str], default: str = "jsonl") -> str:
+    if path is not None and path.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+
+def read_jsonl(file) -> Iterator:
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield string_fields(json.loads(line))
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+def string_fields(request):
+    # CMDB exports often write IDs as numbers; names are built from text
+    if isinstance(request, dict):
+        return {
+            key: str(value) if key in NAMING_FIELDS and value is not None else value
+            for key, value in request.items()
+        }
+    if isinstance(request, list):
+        return [value if value is None else str(value) for value in request]
+    return request
+
+
+def read_csv_requests(file) -> Iterator:
+    yield from csv.DictReader(file)
+
+
+class JsonlWriter:
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, record: dict) -> None:
+        self.file.write(json.dumps(record) + "\n")
+
+    def flush(self) -> None:
+        self.file.flush()
+
+
+class CsvWriter:
+    def __init__(self, file):
+        self.file = file
+        self.writer = csv.DictWriter(file, fieldnames=OUTPUT_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record: dict) -> None:
+        self.writer.writerow(record)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+
+def request_fields(request) -> dict:
+    if isinstance(request, dict):
+        return {field: request.get(field) for field in NAMING_FIELDS}
+    if isinstance(request, list) and len(request) == len(NAMING_FIELDS):
+        return dict(zip(NAMING_FIELDS, request))
+    return dict.fromkeys(NAMING_FIELDS)
+
+
+def name_stream(decoder: Decoder, requests, writer, chunk_size: int = 1000) -> int:
+    # Only one chunk is held in memory at a time. The decoder's cache
+    # carries resolved timezones over from one chunk to the next.
+    failures = 0
+    requests = iter(requests)
+    while True:
+        chunk = list(itertools.islice(requests, chunk_size))
+        if not chunk:
+            return failures
+        valid = [request for request in chunk if not isinstance(request, Exception)]
+        results = iter(decoder.create_names(valid))
+        for request in chunk:
+            if isinstance(request, Exception):
+                name, error = None, request
+            else:
+                result = next(results)
+                name, error = result.name, result.error
+            if error is not None:
+                failures += 1
+            record = request_fields(request)
+            record["name"] = name
+            record["error"] = None if error is None else str(error) or type(error).__name__
+            writer.write(record)
+        writer.flush()
+
+
+def add_decoder_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--api-key", default=os.getenv("DMW_DECODER_API_KEY"))
+    parser.add_argument("--site-csv", default=None, help="defaults to the packaged CSV")
+    parser.add_argument("--site-index", default=None, help="precomputed site index")
+    parser.add_argument(
+        "--cache",
+        default=":memory:",
+        help="SQLite geocode cache file, shared between runs (default: in memory)",
+    )
+    parser.add_argument(
+        "--geocoder", choices=["geoapify", "local", "chained"], default="geoapify"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="geocoding threads")
+    parser.add_argument("--id-width", type=int, default=2, help="building ID digits")
+    parser.add_argument(
+        "--indexed-sites",
+        action="store_true",
+        help="look sites up through an on-disk offset index instead of loading the CSV",
+    )
+    parser.add_argument(
+        "--sites-index-path",
+        default=None,
+        help="where --indexed-sites keeps its index (default: next to the CSV)",
+    )
+    parser.add_argument(
+        "--issued-names",
+        default=None,
+        help="SQLite file of names already issued; new names that collide with one fail",
+    )
+    parser.add_argument(
+        "--disambiguate",
+        action="store_true",
+        help="give colliding names a numeric suffix instead of failing them",
+    )
+
+
+def make_decoder(args) -> Decoder:
+    options = dict(
+        api_key=args.api_key or "",
+        cache=GeocodeCache(args.cache),
+        geocoder=args.geocoder,
+        max_workers=args.workers,
+        id_width=args.id_width,
+        indexed_sites=args.indexed_sites,
+        sites_index_path=args.sites_index_path,
+    )
+    if args.site_csv is not None:
+        options["site_csv"] = args.site_csv
+    if args.site_index is not None:
+        options["site_index"] = site_index.SiteIndex.load(args.site_index)
+    if args.issued_names is not None or args.disambiguate:
+        options["issued_names"] = IssuedNames(args.issued_names, args.disambiguate)
+    return Decoder(**options)
+
+
+def run_name(args) -> int:
+    input_format = args.input_format or guess_format(args.input)
+    output_format = args.output_format or guess_format(args.output, input_format)
+    decoder = make_decoder(args)
+
+    input_file = sys.stdin if args.input in (None, "-") else open(args.input, newline="")
+    output_file = (
+        sys.stdout if args.output in (None, "-") else open(args.output, "w", newline="")
+    )
+    try:
+        if input_format == "csv":
+            requests = read_csv_requests(input_file)
+        else:
+            requests = read_jsonl(input_file)
+        if output_format == "csv":
+            writer = CsvWriter(output_file)
+        else:
+            writer = JsonlWriter(output_file)
+        # normalize_building_id prints its diagnostics, keep them out of
+        # the results when those go to stdout
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+            namer, chunk_size = decoder, args.chunk_size
+            if args.processes > 1:
+                # Each chunk is split across the processes, so make them
+                # big enough to be worth it
+                namer = stack.enter_context(ShardedNamer(decoder, args.processes))
+                chunk_size *= args.processes
+            failures = name_stream(namer, requests, writer, chunk_size=chunk_size)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    if failures:
+        print(f"{failures} requests could not be named", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_audit(args) -> int:
+    timezones = known_timezones()
+    if args.site_index is not None:
+        index = site_index.SiteIndex.load(args.site_index)
+        timezones.update(site["timezone"] for site in index.sites.values())
+    building_ids = None
+    if args.check_buildings:
+        options = {} if args.site_csv is None else {"site_csv": args.site_csv}
+        decoder = Decoder(api_key="", id_width=args.id_width, **options)
+        building_ids = decoder.registry.sites().keys()
+    name_decoder = NameDecoder(
+        timezones=timezones, building_ids=building_ids, id_width=args.id_width
+    )
+
+    input_file = sys.stdin if args.input in (None, "-") else open(args.input)
+    total = 0
+
+    def counted(lines):
+        nonlocal total
+        for total, line in enumerate(lines, start=1):
+            yield line
+
+    invalid = 0
+    try:
+        for finding in name_decoder.audit(counted(input_file)):
+            invalid += 1
+            print(json.dumps(finding._asdict()))
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+    print(f"{total} names audited, {invalid} invalid", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="dmw-decoder", description="Create names per DMW convention"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    name_parser = subparsers.add_parser(
+        "name", help="stream naming requests (JSONL or CSV) and write the names"
+    )
+    name_parser.add_argument("input", nargs="?", help="input file, default stdin")
+    name_parser.add_argument("-o", "--output", help="output file, default stdout")
+    name_parser.add_argument("--input-format", choices=["jsonl", "csv"])
+    name_parser.add_argument("--output-format", choices=["jsonl", "csv"])
+    name_parser.add_argument("--chunk-size", type=int, default=1000)
+    name_parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="name in this many processes; every site is geocoded up front",
+    )
+    add_decoder_arguments(name_parser)
+    name_parser.set_defaults(func=run_name)
+
+    audit_parser = subparsers.add_parser(
+        "audit", help="check existing names, one per line, against the convention"
+    )
+    audit_parser.add_argument("input", nargs="?", help="input file, default stdin")
+    audit_parser.add_argument("--site-csv", default=None)
+    audit_parser.add_argument("--id-width", type=int, default=2, help="building ID digits")
+    audit_parser.add_argument(
+        "--site-index", default=None, help="also accept timezones from this index"
+    )
+    audit_parser.add_argument(
+        "--check-buildings",
+        action="store_true",
+        help="flag building IDs that are not in the site CSV",
+    )
+    audit_parser.set_defaults(func=run_audit)
+
+    subparsers.add_parser(
+        "build-index",
+        help="geocode every building once and write a site index",
+        add_help=False,
+    )
+    return parser
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["build-index"]:
+        return site_index.main(argv[1:])
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
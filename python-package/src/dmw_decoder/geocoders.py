@@ -0,0 +1,268 @@
+import re
+from typing import Callable, NamedTuple, Optional
+
+# Confidence given to regions that span more than one timezone. It is
+# below the Decoder's 0.45 threshold so those addresses come back as TBD
+# on their own, or fall through to the next geocoder when chained.
+SPLIT_REGION_CONFIDENCE = 0.4
+
+# (country, region) -> (standard time abbreviation, confidence)
+REGION_TIMEZONES = {
+    ("US", "AL"): ("CST", 1.0),
+    ("US", "AK"): ("AKST", 1.0),
+    ("US", "AZ"): ("MST", 1.0),
+    ("US", "AR"): ("CST", 1.0),
+    ("US", "CA"): ("PST", 1.0),
+    ("US", "CO"): ("MST", 1.0),
+    ("US", "CT"): ("EST", 1.0),
+    ("US", "DE"): ("EST", 1.0),
+    ("US", "DC"): ("EST", 1.0),
+    ("US", "FL"): ("EST", SPLIT_REGION_CONFIDENCE),
+    ("US", "GA"): ("EST", 1.0),
+    ("US", "HI"): ("HST", 1.0),
+    ("US", "ID"): ("MST", SPLIT_REGION_CONFIDENCE),
+    ("US", "IL"): ("CST", 1.0),
+    ("US", "IN"): ("EST", SPLIT_REGION_CONFIDENCE),
+    ("US", "IA"): ("CST", 1.0),
+    ("US", "KS"): ("CST", SPLIT_REGION_CONFIDENCE),
+    ("US", "KY"): ("EST", SPLIT_REGION_CONFIDENCE),
+    ("US", "LA"): ("CST", 1.0),
+    ("US", "ME"): ("EST", 1.0),
+    ("US", "MD"): ("EST", 1.0),
+    ("US", "MA"): ("EST", 1.0),
+    ("US", "MI"): ("EST", SPLIT_REGION_CONFIDENCE),
+    ("US", "MN"): ("CST", 1.0),
+    ("US", "MS"): ("CST", 1.0),
+    ("US", "MO"): ("CST", 1.0),
+    ("US", "MT"): ("MST", 1.0),
+    ("US", "NE"): ("CST", SPLIT_REGION_CONFIDENCE),
+    ("US", "NV"): ("PST", 1.0),
+    ("US", "NH"): ("EST", 1.0),
+    ("US", "NJ"): ("EST", 1.0),
+    ("US", "NM"): ("MST", 1.0),
+    ("US", "NY"): ("EST", 1.0),
+    ("US", "NC"): ("EST", 1.0),
+    ("US", "ND"): ("CST", SPLIT_REGION_CONFIDENCE),
+    ("US", "OH"): ("EST", 1.0),
+    ("US", "OK"): ("CST", 1.0),
+    ("US", "OR"): ("PST", SPLIT_REGION_CONFIDENCE),
+    ("US", "PA"): ("EST", 1.0),
+    ("US", "PR"): ("AST", 1.0),
+    ("US", "RI"): ("EST", 1.0),
+    ("US", "SC"): ("EST", 1.0),
+    ("US", "SD"): ("CST", SPLIT_REGION_CONFIDENCE),
+    ("US", "TN"): ("CST", SPLIT_REGION_CONFIDENCE),
+    ("US", "TX"): ("CST", SPLIT_REGION_CONFIDENCE),
+    ("US", "UT"): ("MST", 1.0),
+    ("US", "VT"): ("EST", 1.0),
+    ("US", "VA"): ("EST", 1.0),
+    ("US", "WA"): ("PST", 1.0),
+    ("US", "WV"): ("EST", 1.0),
+    ("US", "WI"): ("CST", 1.0),
+    ("US", "WY"): ("MST", 1.0),
+    ("CA", "AB"): ("MST", 1.0),
+    ("CA", "BC"): ("PST", 1.0),
+    ("CA", "MB"): ("CST", 1.0),
+    ("CA", "NB"): ("AST", 1.0),
+    ("CA", "NL"): ("NST", SPLIT_REGION_CONFIDENCE),
+    ("CA", "NS"): ("AST", 1.0),
+    ("CA", "NT"): ("MST", 1.0),
+    ("CA", "NU"): ("EST", SPLIT_REGION_CONFIDENCE),
+    ("CA", "ON"): ("EST", SPLIT_REGION_CONFIDENCE),
+    ("CA", "PE"): ("AST", 1.0),
+    ("CA", "QC"): ("EST", 1.0),
+    ("CA", "SK"): ("CST", 1.0),
+    ("CA", "YT"): ("MST", 1.0),
+}
+
+# Countries that observe a single timezone
+COUNTRY_TIMEZONES = {
+    "AT": ("CET", 1.0),
+    "BE": ("CET", 1.0),
+    "CH": ("CET", 1.0),
+    "CZ": ("CET", 1.0),
+    "DE": ("CET", 1.0),
+    "DK": ("CET", 1.0),
+    "FI": ("EET", 1.0),
+    "FR": ("CET", 1.0),
+    "GB": ("GMT", 1.0),
+    "GR": ("EET", 1.0),
+    "IN": ("IST", 1.0),
+    "IT": ("CET", 1.0),
+    "JP": ("JST", 1.0),
+    "KR": ("KST", 1.0),
+    "NL": ("CET", 1.0),
+    "NO": ("CET", 1.0),
+    "NZ": ("NZST", 1.0),
+    "PL": ("CET", 1.0),
+    "SE": ("CET", 1.0),
+}
+
+COUNTRY_NAMES = {
+    "austria": "AT",
+    "belgium": "BE",
+    "canada": "CA",
+    "czech republic": "CZ",
+    "czechia": "CZ",
+    "denmark": "DK",
+    "england": "GB",
+    "finland": "FI",
+    "france": "FR",
+    "germany": "DE",
+    "great britain": "GB",
+    "greece": "GR",
+    "india": "IN",
+    "italy": "IT",
+    "japan": "JP",
+    "netherlands": "NL",
+    "new zealand": "NZ",
+    "norway": "NO",
+    "poland": "PL",
+    "scotland": "GB",
+    "south korea": "KR",
+    "sweden": "SE",
+    "switzerland": "CH",
+    "u.s.a.": "US",
+    "uk": "GB",
+    "united kingdom": "GB",
+    "united states of america": "US",
+    "united states": "US",
+    "us": "US",
+    "usa": "US",
+    "wales": "GB",
+}
+
+US_STATE_ZIP = re.compile(r"\b([A-Z]{2})\s+\d{5}(?:-\d{4})?\b")
+CA_PROVINCE_POSTAL = re.compile(r"\b([A-Z]{2})\s+[A-Z]\d[A-Z]\s?\d[A-Z]\d\b")
+
+
+class GeocodeResult(NamedTuple):
+    timezone: str
+    confidence: float
+
+
+class Geocoder:
+    # Backends return None when they cannot place an address at all
+    def lookup(self, address: str) -> Optional[GeocodeResult]:
+        raise NotImplementedError
+
+    async def alookup(self, address: str) -> Optional[GeocodeResult]:
+        return self.lookup(address)
+
+
+class GeoapifyGeocoder(Geocoder):
+    # The HTTP calls stay on the Decoder (geo_lookup_by_address) so this
+    # backend only needs the function that fetches the raw response.
+    def __init__(
+        self,
+        fetch: Optional[Callable[[str], dict]] = None,
+        afetch: Optional[Callable] = None,
+    ):
+        self.fetch = fetch
+        self.afetch = afetch
+
+    @staticmethod
+    def parse(geo_data: dict) -> Optional[GeocodeResult]:
+        # No results, or a batch result without a rank, means the address
+        # could not be placed
+        results = geo_data.get("results")
+        if not results or "rank" not in results[0]:
+            return None
+        first_result = results[0]
+        return GeocodeResult(
+            timezone=first_result.get("timezone", {}).get("abbreviation_STD", "TBD"),
+            confidence=first_result["rank"]["confidence"],
+        )
+
+    def lookup(self, address: str) -> Optional[GeocodeResult]:
+        if self.fetch is None:
+            raise TypeError("This geocoder has no synchronous fetch function")
+        return self.parse(self.fetch(address))
+
+    async def alookup(self, address: str) -> Optional[GeocodeResult]:
+        if self.afetch is None:
+            return self.lookup(address)
+        return self.parse(await self.afetch(address))
+
+
+class LocalGeocoder(Geocoder):
+    # Resolves addresses in process from the country and state/province
+    # found in the address text. No network access is needed.
+    def __init__(
+        self,
+        region_timezones: Optional[dict] = None,
+        country_timezones: Optional[dict] = None,
+        country_names: Optional[dict] = None,
+    ):
+        self.region_timezones = {**REGION_TIMEZONES, **(region_timezones or {})}
+        self.country_timezones = {**COUNTRY_TIMEZONES, **(country_timezones or {})}
+        self.country_names = {**COUNTRY_NAMES, **(country_names or {})}
+
+    def country(self, address: str) -> Optional[str]:
+        last_part = address.rsplit(",", 1)[-1].strip().lower()
+        country = self.country_names.get(last_part)
+        if country is None and US_STATE_ZIP.search(address):
+            # US addresses are often written without a country
+            country = "US"
+        return country
+
+    def lookup(self, address: str) -> Optional[GeocodeResult]:
+        country = self.country(address)
+        if country is None:
+            return None
+        if country == "US":
+            match = US_STATE_ZIP.search(address)
+        elif country == "CA":
+            match = CA_PROVINCE_POSTAL.search(address)
+        else:
+            match = None
+        if match is not None:
+            found = self.region_timezones.get((country, match.group(1)))
+            if found is not None:
+                return GeocodeResult(*found)
+        found = self.country_timezones.get(country)
+        if found is not None:
+            return GeocodeResult(*found)
+        return None
+
+
+class ChainedGeocoder(Geocoder):
+    # Tries each geocoder in turn and keeps the first confident answer.
+    # A geocoder that fails does not lose an answer already in hand: the
+    # error is only raised when no geocoder placed the address at all.
+    def __init__(self, *geocoders: Geocoder, min_confidence: float = 0.45):
+        self.geocoders = geocoders
+        self.min_confidence = min_confidence
+
+    def lookup(self, address: str) -> Optional[GeocodeResult]:
+        fallback = error = None
+        for geocoder in self.geocoders:
+            try:
+                result = geocoder.lookup(address)
+            except Exception as e:
+                error = e
+                continue
+            if result is not None and result.confidence > self.min_confidence:
+                return result
+            fallback = result if result is not None else fallback
+        return self.fallback(fallback, error)
+
+    async def alookup(self, address: str) -> Optional[GeocodeResult]:
+        fallback = error = None
+        for geocoder in self.geocoders:
+            try:
+                result = await geocoder.alookup(address)
+            except Exception as e:
+                error = e
+                continue
+            if result is not None and result.confidence > self.min_confidence:
+                return result
+            fallback = result if result is not None else fallback
+        return self.fallback(fallback, error)
+
+    def fallback(
+        self, fallback: Optional[GeocodeResult], error: Optional[Exception]
+    ) -> Optional[GeocodeResult]:
+        if fallback is None and error is not None:
+            raise error
+        return fallback
@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+MAX_LENGTH = 15
+
+
+class NameCollisionError(ValueError):
+    def __init__(self, name: str, key: str, owner: str):
+        super().__init__(f"The name {name} is already issued to {owner}")
+        self.name = name
+        self.key = key
+        self.owner = owner
+
+
+class IssuedNames:
+    # Every name handed out, keyed both ways so a collision is one dict
+    # lookup. key is whatever identifies the host the name was built for;
+    # Decoder uses the name before the component was truncated, so asking
+    # again for the same host returns the same name rather than colliding.
+    #
+    # With a path the names are also written to SQLite, which keeps them
+    # unique across runs and across processes sharing the file.
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        disambiguate: bool = False,
+        max_attempts: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = None if path is None else str(path)
+        self.disambiguate = disambiguate
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._owners: Dict[str, str] = {}
+        self._names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._connection = None
+        if self.path is not None:
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False, isolation_level=None
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS issued_names ("
+                "name TEXT PRIMARY KEY, "
+                "key TEXT NOT NULL UNIQUE, "
+                "issued_at REAL NOT NULL)"
+            )
+
+    def candidates(self, name: str, reserved: int = 0) -> Iterator[str]:
+        # The name itself, then with a counter appended, overwriting its
+        # tail once the name is at the length limit. The first `reserved`
+        # characters (building, function, timezone, entity) are never
+        # overwritten.
+        yield name
+        for attempt in range(2, self.max_attempts + 1):
+            suffix = str(attempt)
+            keep = min(len(name), MAX_LENGTH - len(suffix))
+            if keep < reserved:
+                return
+            yield name[:keep] + suffix
+
+    def issue(self, name: str, key: str, reserved: int = 0) -> str:
+        with self._lock:
+            issued = self._issued_name(key)
+            if issued is not None:
+                return issued
+            candidates = self.candidates(name, reserved) if self.disambiguate else [name]
+            owner = None
+            for candidate in candidates:
+                owner = self._claim(candidate, key)
+                if owner is None:
+                    return candidate
+                if owner == key:
+                    # Another process named this host in the meantime
+                    return self._issued_name(key)
+            raise NameCollisionError(name, key, owner or "")
+
+    def _issued_name(self, key: str) -> Optional[str]:
+        issued = self._names.get(key)
+        if issued is None and self._connection is not None:
+            row = self._connection.execute(
+                "SELECT name FROM issued_names WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                issued = row[0]
+                self._remember(issued, key)
+        return issued
+
+    def _claim(self, name: str, key: str) -> Optional[str]:
+        # Returns None when the name was free and is now ours, otherwise
+        # the key it was already issued to
+        owner = self._owners.get(name)
+        if owner is not None:
+            return owner
+        if self._connection is not None:
+            try:
+                self._connection.execute(
+                    "INSERT INTO issued_names VALUES (?, ?, ?)", (name, key, self.clock())
+                )
+            except sqlite3.IntegrityError:
+                # Issued by an earlier run or another process
+                row = self._connection.execute(
+                    "SELECT key FROM issued_names WHERE name = ?", (name,)
+                ).fetchone()
+                if row is None:
+                    # The name is free but the key already has one
+                    return key
+                self._remember(name, row[0])
+                return row[0]
+        self._remember(name, key)
+        return None
+
+    def _remember(self, name: str, key: str) -> None:
+        self._owners[name] = key
+        self._names[key] = name
+
+    def owner(self, name: str) -> Optional[str]:
+        with self._lock:
+            owner = self._owners.get(name)
+            if owner is None and self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT key FROM issued_names WHERE name = ?", (name,)
+                ).fetchone()
+                if row is not None:
+                    owner = row[0]
+            return owner
+
+    def by_key_prefix(self, prefix: str) -> List[Tuple[str, str]]:
+        # (name, key) pairs, in key order, for every key starting with
+        # prefix. The SQLite query is a range scan of the unique key index.
+        with self._lock:
+            if self._connection is None:
+                return sorted(
+                    ((name, key) for key, name in self._names.items() if key.startswith(prefix)),
+                    key=lambda item: item[1],
+                )
+            end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            return self._connection.execute(
+                "SELECT name, key FROM issued_names WHERE key >= ? AND key < ? ORDER BY key",
+                (prefix, end),
+            ).fetchall()
+
+    def __contains__(self, name: str) -> bool:
+        return self.owner(name) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._connection is None:
+                return len(self._owners)
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM issued_names"
+            ).fetchone()
+        return count
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
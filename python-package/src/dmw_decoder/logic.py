@@ -1,8 +1,52 @@
+import contextlib
 import csv
+import dataclasses
 import importlib.resources
 import pathlib
+import threading
+import time
+import warnings
+from collections.abc import Mapping
+from urllib.parse import urlencode
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Union
 
-import httpx
+from .cache import GeocodeCache
+from .geocoders import (
+    ChainedGeocoder,
+    GeoapifyGeocoder,
+    GeocodeResult,
+    Geocoder,
+    LocalGeocoder,
+)
+from .issued import IssuedNames
+from .metrics import Metrics
+from .ratelimit import TokenBucket, retry_after_seconds
+from .resilience import CircuitBreaker, CircuitOpenError, HedgePolicy, RetryPolicy
+from .registry import IndexedSites, SiteRegistry, load_sites
+from .reverse import DEVICE_FUNCTIONS
+from .singleflight import SingleFlight
+from .site_index import SiteIndex
+
+if TYPE_CHECKING:
+    import httpx
+
+NAMING_FIELDS = ("building_id", "device_function", "entity", "component")
+NULL_TIMER = contextlib.nullcontext()
+GEOAPIFY_URL = "https://api.geoapify.com"
+SEARCH_PATH = "/v1/geocode/search"
+BATCH_PATH = "/v1/batch/geocode/search"
+# The batch API takes at most this many addresses per job
+BATCH_SIZE = 1000
+
+
+@dataclasses.dataclass
+class NameResult:
+    name: Optional[str] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 class Decoder:
@@ -11,13 +55,143 @@ class Decoder:
         api_key: str,
         site_csv: pathlib.Path = importlib.resources.files("dmw_decoder.data")
         / "Buildings.csv",
-        client=httpx.Client(),
+        client: Optional["httpx.Client"] = None,
+        cache: Optional[GeocodeCache] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_workers: int = 1,
+        rate_limit_retries: int = 3,
+        site_index: Optional[SiteIndex] = None,
+        geocoder: Union[Geocoder, str, None] = None,
+        metrics: Optional[Metrics] = None,
+        id_width: int = 2,
+        indexed_sites: bool = False,
+        sites_index_path: Optional[str] = None,
+        issued_names: Optional[IssuedNames] = None,
+        timeout: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        hedge: Optional[HedgePolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        base_url: str = GEOAPIFY_URL,
+        lean: bool = False,
+        batch_poll_interval: float = 1.0,
+        batch_timeout: float = 300.0,
     ):
         self.api_key = api_key
         self.site_csv = site_csv
-        self.client = client
+        self._client = client
+        # Only a client made by make_client is ours to close
+        self._owns_client = False
+        self._client_lock = threading.Lock()
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.max_workers = max_workers
+        self.rate_limit_retries = rate_limit_retries
+        self.site_index = site_index
+        self.geocoder = self.make_geocoder(geocoder)
+        self.metrics = metrics
+        self.id_width = id_width
+        self.indexed_sites = indexed_sites
+        # Where indexed_sites keeps its offset index; defaults to next to
+        # the CSV, which may be a read-only install directory
+        self.sites_index_path = sites_index_path
+        self.issued_names = issued_names
+        self._lookups = SingleFlight()
+        self.timeout = timeout
+        self.retry = retry
+        self.hedge = hedge
+        self.circuit_breaker = circuit_breaker
+        # Points lookups somewhere else, e.g. at a FakeGeoapify stand-in
+        self.base_url = base_url.rstrip("/")
+        self.lean = lean
+        self.batch_poll_interval = batch_poll_interval
+        self.batch_timeout = batch_timeout
+        self._hedge_executor = None
+        # Device function -> building ID -> name prefix, filled by warm_up
+        self._prefixes: dict = {}
+        # Site CSV signature the table was built from
+        self._prefix_signature = None
+        self.registry = SiteRegistry(site_csv, self._load_sites)
+
+    @property
+    def client(self):
+        # httpx is only imported, and its connection pool only built, once
+        # a lookup really has to go over the network
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self.make_client()
+                    self._owns_client = True
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+        self._owns_client = False
+
+    def make_client(self) -> "httpx.Client":
+        import httpx
+
+        return httpx.Client(**self.client_options())
+
+    def client_options(self) -> dict:
+        # Lean mode keeps more connections alive for longer and uses HTTP/2
+        # when the optional h2 package is installed. httpx already asks for
+        # gzip, and for brotli when a brotli package is installed.
+        if not self.lean:
+            return {}
+        import importlib.util
+
+        import httpx
+
+        return {
+            "http2": importlib.util.find_spec("h2") is not None,
+            "limits": httpx.Limits(
+                max_keepalive_connections=max(20, self.max_workers), keepalive_expiry=60
+            ),
+        }
+
+    def close(self) -> None:
+        if self._owns_client:
+            self._client.close()
+            self._client = None
+            self._owns_client = False
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def timed(self, stage: str):
+        # Keeps instrumentation down to one attribute check when disabled
+        if self.metrics is None:
+            return NULL_TIMER
+        return self.metrics.time(stage)
+
+    def count(self, counter: str) -> None:
+        if self.metrics is not None:
+            self.metrics.increment(counter)
+
+    def _load_sites(self) -> Mapping:
+        with self.timed("read_csv"):
+            if self.indexed_sites:
+                return IndexedSites(
+                    self.site_csv,
+                    self.id_width,
+                    self.normalize_building_id,
+                    index_path=self.sites_index_path,
+                )
+            return load_sites(self.site_csv, self.normalize_building_id)
 
     def read_csv(self) -> dict:
+        # Naming goes through self.registry; this is kept for older callers
+        warnings.warn(
+            "Decoder.read_csv is deprecated, use Decoder.registry.sites() instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         addresses = {}
         with open(self.site_csv) as file:
             for line in csv.DictReader(file):
@@ -32,18 +206,309 @@ class Decoder:
         except KeyError:
             raise KeyError(f"The value {building_id} is not in lookup csv.")
 
-    def geo_lookup_by_address(self, lookup_address: str) -> dict:
-        base_url = "https://api.geoapify.com/v1/geocode/search?text="
+    def make_geocoder(self, geocoder: Union[Geocoder, str, None]) -> Geocoder:
+        if geocoder is None or geocoder == "geoapify":
+            return self.geoapify_geocoder()
+        elif geocoder == "local":
+            return LocalGeocoder()
+        elif geocoder == "chained":
+            return ChainedGeocoder(LocalGeocoder(), self.geoapify_geocoder())
+        elif isinstance(geocoder, str):
+            raise ValueError(f"Unknown geocoder {geocoder}")
+        else:
+            return geocoder
+
+    def geoapify_geocoder(self) -> GeoapifyGeocoder:
+        return GeoapifyGeocoder(fetch=self.geo_lookup_by_address)
+
+    def geocode_url(self, lookup_address: str) -> str:
+        if self.lean:
+            # Only the best match is used, so only ask for one
+            query = {"text": lookup_address, "format": "json", "limit": 1, "apiKey": self.api_key}
+            return f"{self.base_url}{SEARCH_PATH}?{urlencode(query)}"
+        base_url = f"{self.base_url}{SEARCH_PATH}?text="
         params = f"&format=json&apiKey={self.api_key}"
-        response = self.client.get(f"{base_url}{lookup_address}{params}")
+        return f"{base_url}{lookup_address}{params}"
+
+    def geo_lookup_by_address(self, lookup_address: str) -> dict:
+        # Threads naming hosts in the same building share one request
+        key = GeocodeCache.normalize_address(lookup_address)
+        geo_data, shared = self._lookups.do_shared(
+            key, self._fetch_geocode, lookup_address
+        )
+        if shared:
+            self.count("coalesced_lookups")
+        return geo_data
+
+    def _fetch_geocode(self, lookup_address: str) -> dict:
+        response = self._request(self.geocode_url(lookup_address))
+        with self.timed("json_parse"):
+            return self.parse_response(response)
+
+    def _request(self, url: str, send: Optional[Callable] = None) -> "httpx.Response":
+        self.check_circuit()
+        try:
+            response = self._get_with_retries(url, send)
+        except Exception:
+            self.record_outcome(None)
+            raise
+        self.record_outcome(response.status_code)
         response.raise_for_status()
-        return response.json()
+        return response
+
+    def parse_response(self, response: "httpx.Response") -> dict:
+        geo_data = response.json()
+        if not self.lean:
+            return geo_data
+        # Keep just what GeoapifyGeocoder.parse reads, so coalesced and
+        # cached answers stay small
+        results = []
+        for result in geo_data.get("results", [])[:1]:
+            lean_result = {"rank": {"confidence": result["rank"]["confidence"]}}
+            timezone = result.get("timezone", {}).get("abbreviation_STD")
+            if timezone is not None:
+                lean_result["timezone"] = {"abbreviation_STD": timezone}
+            results.append(lean_result)
+        return {"results": results}
+
+    def _get_with_retries(self, url: str, send: Optional[Callable] = None) -> "httpx.Response":
+        if send is None:
+            send = self._send
+        failures = 0
+        rate_limited = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = send(url)
+            except Exception as e:
+                self.count("request_errors")
+                if not self.should_retry(failures, error=e):
+                    raise
+                failures += 1
+                time.sleep(self.retry.delay(failures))
+                continue
+            self.observe_response(response, time.perf_counter() - start)
+            if response.status_code == 429 and rate_limited < self.rate_limit_retries:
+                rate_limited += 1
+                self.back_off(retry_after_seconds(response.headers))
+            elif self.should_retry(failures, status_code=response.status_code):
+                failures += 1
+                time.sleep(self.retry.delay(failures))
+            else:
+                return response
+
+    def batch_url(self, job_id: Optional[str] = None) -> str:
+        query = {"apiKey": self.api_key}
+        if job_id is not None:
+            query = {"id": job_id, **query}
+        return f"{self.base_url}{BATCH_PATH}?{urlencode(query)}"
+
+    def batch_geocode(self, addresses: List[str]) -> list:
+        # One batch job: submit the addresses, poll until the job is done,
+        # and return its results, one per address in the same order
+        def submit(url):
+            return self.client.post(url, json=addresses, **self.request_options())
+
+        job = self._request(self.batch_url(), submit).json()
+        url = self.batch_url(job["id"])
+        deadline = time.monotonic() + self.batch_timeout
+        while True:
+            response = self._request(url)
+            if response.status_code != 202:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Batch job {job['id']} did not finish in {self.batch_timeout} seconds"
+                )
+            time.sleep(self.batch_poll_interval)
+        return self.batch_results(job["id"], addresses, response)
+
+    def batch_results(self, job_id: str, addresses: List[str], response) -> list:
+        results = response.json()
+        if len(results) != len(addresses):
+            raise LookupError(
+                f"Batch job {job_id} returned {len(results)} results for {len(addresses)} addresses"
+            )
+        return results
+
+    def batch_timezones(self, addresses: Iterable[str]) -> dict:
+        # Like resolve_timezones, but addresses that are not already known
+        # are geocoded BATCH_SIZE at a time through the batch API and go
+        # through the same confidence check and cache as single lookups
+        timezones, pending = self.unknown_addresses(addresses)
+        for start in range(0, len(pending), BATCH_SIZE):
+            chunk = pending[start : start + BATCH_SIZE]
+            try:
+                with self.timed("geocode"):
+                    results = self.batch_geocode(chunk)
+            except Exception as e:
+                self.batch_failed(timezones, chunk, e)
+            else:
+                self.batch_succeeded(timezones, chunk, results)
+        return timezones
+
+    def unknown_addresses(self, addresses: Iterable[str]) -> tuple:
+        # Returns ({address: known timezone}, [addresses to look up])
+        timezones = {}
+        pending = []
+        for address in dict.fromkeys(addresses):
+            timezone = self.known_timezone(address)
+            if timezone is None:
+                pending.append(address)
+            else:
+                timezones[address] = timezone
+        return timezones, pending
+
+    def batch_failed(self, timezones: dict, chunk: List[str], error: Exception) -> None:
+        for address in chunk:
+            try:
+                timezones[address] = self.stale_timezone(address, error)
+            except Exception as e:
+                timezones[address] = e
+
+    def batch_succeeded(self, timezones: dict, chunk: List[str], results: list) -> None:
+        for address, result in zip(chunk, results):
+            geocoded = GeoapifyGeocoder.parse({"results": [result]})
+            try:
+                timezone = self.timezone_from_result(address, geocoded)
+            except LookupError as e:
+                timezones[address] = e
+                continue
+            if self.cache is not None:
+                self.cache.set(address, timezone)
+            timezones[address] = timezone
+
+    def request_options(self) -> dict:
+        # httpx treats timeout=None as "never time out", so only pass one
+        # when it was configured
+        return {} if self.timeout is None else {"timeout": self.timeout}
+
+    def _send(self, url: str) -> "httpx.Response":
+        delay = None if self.hedge is None else self.hedge.delay()
+        if delay is None:
+            return self.client.get(url, **self.request_options())
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        with self._client_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+        submit = self._hedge_executor.submit
+        pending = {submit(self.client.get, url, **self.request_options())}
+        done, pending = wait(pending, timeout=delay)
+        if not done and self.may_hedge():
+            self.count("hedged_requests")
+            pending.add(submit(self.client.get, url, **self.request_options()))
+        # The first response wins; an error only counts once both failed
+        while True:
+            if not done:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            if future.exception() is None or not (done or pending):
+                return future.result()
+
+    def may_hedge(self) -> bool:
+        # A hedge is an extra request, so it must not push us over quota
+        return self.rate_limiter is None or self.rate_limiter.try_acquire()
+
+    def should_retry(
+        self, failures: int, error: Optional[Exception] = None, status_code: int = 0
+    ) -> bool:
+        if self.retry is None or failures >= self.retry.retries:
+            return False
+        if error is not None:
+            return self.retry.retryable_error(error)
+        return status_code in self.retry.statuses
+
+    def observe_response(self, response: "httpx.Response", seconds: float) -> None:
+        if self.metrics is not None:
+            self.metrics.observe_http(response.status_code, seconds)
+        if self.hedge is not None and response.status_code < 500:
+            self.hedge.observe(seconds)
+
+    def check_circuit(self) -> None:
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+            self.count("circuit_open")
+            raise CircuitOpenError("Geocoding API circuit is open")
+
+    def record_outcome(self, status_code: Optional[int]) -> None:
+        # Only outages count against the circuit: no response at all, 5xx,
+        # or still being rate limited after every retry
+        if self.circuit_breaker is None:
+            return
+        if status_code is None or status_code >= 500 or status_code == 429:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    def back_off(self, seconds: float) -> None:
+        # With a shared limiter every worker waits, not just this one
+        if self.rate_limiter is not None:
+            self.rate_limiter.pause(seconds)
+        else:
+            time.sleep(seconds)
 
     def get_timezone_by_address(self, lookup_address: str) -> str:
-        geo_data = self.geo_lookup_by_address(lookup_address)
+        timezone = self.known_timezone(lookup_address)
+        if timezone is not None:
+            return timezone
+        if self.cache is not None and self.cache.shared:
+            with self.cache.locked(lookup_address):
+                # Another process may have answered while we waited
+                timezone = self.cache.get(lookup_address)
+                if timezone is not None:
+                    return timezone
+                return self.lookup_timezone(lookup_address)
+        return self.lookup_timezone(lookup_address)
+
+    def lookup_timezone(self, lookup_address: str) -> str:
+        try:
+            with self.timed("geocode"):
+                result = self.geocoder.lookup(lookup_address)
+        except Exception as e:
+            return self.stale_timezone(lookup_address, e)
+        timezone = self.timezone_from_result(lookup_address, result)
+        if self.cache is not None:
+            self.cache.set(lookup_address, timezone)
+        return timezone
+
+    def stale_timezone(self, lookup_address: str, error: Exception) -> str:
+        # With a circuit breaker configured a failed lookup falls back to
+        # the last known, possibly expired, cached answer; otherwise the
+        # error is raised as before.
+        if self.circuit_breaker is not None and self.cache is not None:
+            timezone = self.cache.get(lookup_address, stale=True)
+            if timezone is not None:
+                self.count("stale_fallbacks")
+                return timezone
+        raise error
+
+    def known_timezone(self, lookup_address: str) -> Optional[str]:
+        # Answers that need no network call: the precomputed index first,
+        # then the geocode cache
+        if self.site_index is not None:
+            timezone = self.site_index.timezone(lookup_address)
+            if timezone is not None:
+                self.count("site_index_hits")
+                return timezone
+        if self.cache is not None:
+            timezone = self.cache.get(lookup_address)
+            self.count("cache_misses" if timezone is None else "cache_hits")
+            return timezone
+        return None
+
+    def timezone_from_geo_data(self, geo_data: dict) -> str:
+        return self.timezone_from_result("", GeoapifyGeocoder.parse(geo_data))
+
+    def timezone_from_result(
+        self, lookup_address: str, result: Optional[GeocodeResult]
+    ) -> str:
+        if result is None:
+            raise LookupError(f"Unable to geocode {lookup_address}")
         # If confidence is > 45% return first result's timezone
-        if geo_data["results"][0]["rank"]["confidence"] > 0.45:
-            return geo_data["results"][0]["timezone"]["abbreviation_STD"]
+        if result.confidence > 0.45:
+            return result.timezone
         else:
             return "TBD"
 
@@ -53,11 +518,12 @@ class Decoder:
         except ValueError as e:
             print(f"The value {building_id} is not an integer. Error: {e}")
             raise
-        if id >= 100:
-            print(f"The value {building_id} is larger than 99.")
+        limit = 10**self.id_width
+        if id >= limit:
+            print(f"The value {building_id} is larger than {limit - 1}.")
             raise ValueError
-        elif id < 10 and len(building_id) < 2:
-            padded_id = "0" + building_id
+        elif len(building_id) < self.id_width:
+            padded_id = building_id.zfill(self.id_width)
             return padded_id
         else:
             return building_id
@@ -128,19 +594,213 @@ class Decoder:
             leftovers = component[:remaining_chars]
             return leftovers
 
+    def site_timezones(self, batch: bool = False) -> dict:
+        # Building ID -> timezone, or the exception, for every site. With
+        # batch=True geoapify lookups go through the batch API, so a whole
+        # registry takes a handful of requests instead of one per address.
+        addresses = self.site_addresses()
+        with self.timed("resolve_timezones"):
+            if batch and isinstance(self.geocoder, GeoapifyGeocoder):
+                timezones = self.batch_timezones(addresses.values())
+            else:
+                timezones = self.resolve_timezones(set(addresses.values()))
+        return {building_id: timezones[address] for building_id, address in addresses.items()}
+
+    def site_addresses(self) -> dict:
+        sites = self.registry.sites()
+        return {building_id: sites[building_id]["Address"] for building_id in sites}
+
+    def warm_up(self, batch: bool = False) -> int:
+        # Geocodes every site once and precomputes the building, function
+        # and timezone part of every name, leaving create_netbios_compatible_name
+        # with only the entity and component checks. The table is dropped
+        # as soon as the site CSV changes; call warm_up again to rebuild it.
+        signature = self.registry.file_signature()
+        return self.set_prefixes(self.site_timezones(batch), signature)
+
+    def set_prefixes(self, site_timezones: dict, signature: tuple) -> int:
+        # Keyed by the official function names and by the building ID both
+        # padded and as written without zeros ("07" and "7"); anything else
+        # takes the normal path
+        prefixes = {function: {} for function in DEVICE_FUNCTIONS.values()}
+        warmed = 0
+        for building_id, timezone in site_timezones.items():
+            if isinstance(timezone, Exception):
+                # Named the normal way, which raises the error
+                continue
+            warmed += 1
+            aliases = {building_id, str(int(building_id))}
+            for letter, function in DEVICE_FUNCTIONS.items():
+                for alias in aliases:
+                    prefixes[function][alias] = f"{building_id}{letter}{timezone}"
+        self._prefixes = prefixes
+        self._prefix_signature = signature
+        return warmed
+
+    def warm_name(
+        self, building_id: str, device_function: str, entity: str, component: str
+    ) -> Optional[str]:
+        # None when the request is not covered by the warm_up table
+        if not self._prefixes:
+            return None
+        if self.registry.file_signature() != self._prefix_signature:
+            # The CSV changed, so sites may have moved or gone
+            self._prefixes = {}
+            return None
+        try:
+            prefix = self._prefixes[device_function][building_id]
+        except KeyError:
+            return None
+        partial_name = prefix + self.entity_check(entity)
+        final_name = partial_name + self.truncate_component(component, partial_name)
+        self.netbios_compatibility_check(final_name)
+        return self.issue_name(final_name, partial_name, component)
+
     def create_netbios_compatible_name(
         self, building_id: str, device_function: str, entity: str, component: str
     ) -> str:
-        sites = self.read_csv()
-        normal_building_id = self.normalize_building_id(building_id)
-        formatted_device_function = self.format_device_function(device_function)
-        address = self.get_address_by_building_id(sites, building_id)
+        name = self.warm_name(building_id, device_function, entity, component)
+        if name is not None:
+            return name
+        sites = self.registry.sites()
+        with self.timed("validate_input"):
+            normal_building_id = self.normalize_building_id(building_id)
+            formatted_device_function = self.format_device_function(device_function)
+        with self.timed("lookup_address"):
+            address = self.get_address_by_building_id(sites, building_id)
         timezone = self.get_timezone_by_address(address)
+        return self.assemble_name(
+            normal_building_id, formatted_device_function, timezone, entity, component
+        )
+
+    def assemble_name(
+        self,
+        normal_building_id: str,
+        formatted_device_function: str,
+        timezone: str,
+        entity: str,
+        component: str,
+    ) -> str:
+        with self.timed("assemble_name"):
+            final_name, partial_name = self.build_name(
+                normal_building_id, formatted_device_function, timezone, entity, component
+            )
+            return self.issue_name(final_name, partial_name, component)
+
+    def build_name(
+        self,
+        normal_building_id: str,
+        formatted_device_function: str,
+        timezone: str,
+        entity: str,
+        component: str,
+    ) -> tuple:
+        # Returns the name and the part of it before the component
         checked_entity = self.entity_check(entity)
         partial_name = (
-            f"{normal_building_id}{formatted_device_function}{timezone}{checked_entity}"
+            f"{normal_building_id}{formatted_device_function}{timezone}"
+            f"{checked_entity}"
         )
         formatted_component = self.truncate_component(component, partial_name)
         final_name = partial_name + formatted_component
         self.netbios_compatibility_check(final_name)
-        return final_name
+        return final_name, partial_name
+
+    def issue_name(self, final_name: str, partial_name: str, component: str) -> str:
+        if self.issued_names is None:
+            return final_name
+        issued_name = self.issued_names.issue(
+            final_name, partial_name + component, reserved=len(partial_name)
+        )
+        if issued_name != final_name:
+            self.count("names_disambiguated")
+        return issued_name
+
+    def naming_arguments(self, request) -> tuple:
+        # Requests may be (building_id, device_function, entity, component)
+        # tuples or dicts using the create_netbios_compatible_name keywords
+        if isinstance(request, Mapping):
+            return tuple(request[field] for field in NAMING_FIELDS)
+        building_id, device_function, entity, component = request
+        return building_id, device_function, entity, component
+
+    def resolve_timezones(
+        self, addresses: Iterable[str], max_workers: Optional[int] = None
+    ) -> dict:
+        addresses = list(addresses)
+        if max_workers is None:
+            max_workers = self.max_workers
+        if max_workers > 1 and len(addresses) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            # httpx.Client is thread safe, so the workers share its pool
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                timezones = executor.map(self._resolve_timezone, addresses)
+                return dict(zip(addresses, timezones))
+        return {address: self._resolve_timezone(address) for address in addresses}
+
+    def _resolve_timezone(self, address: str):
+        try:
+            return self.get_timezone_by_address(address)
+        except Exception as e:
+            return e
+
+    def create_names(self, requests: Iterable) -> List[NameResult]:
+        with self.timed("prepare_batch"):
+            prepared, addresses = self._prepare_batch(requests)
+        # Every unique address is geocoded once for the whole batch
+        with self.timed("resolve_timezones"):
+            timezones = self.resolve_timezones(set(addresses.values()))
+        return self._collect_batch(prepared, addresses, timezones)
+
+    def _prepare_batch(self, requests: Iterable) -> tuple:
+        sites = self.registry.sites()
+        prepared = []
+        addresses = {}
+        for request in requests:
+            try:
+                building_id, device_function, entity, component = (
+                    self.naming_arguments(request)
+                )
+                normal_building_id = self.normalize_building_id(building_id)
+                formatted_device_function = self.format_device_function(
+                    device_function
+                )
+                if normal_building_id not in addresses:
+                    addresses[normal_building_id] = self.get_address_by_building_id(
+                        sites, building_id
+                    )
+            except Exception as e:
+                prepared.append(e)
+                continue
+            prepared.append(
+                (normal_building_id, formatted_device_function, entity, component)
+            )
+        return prepared, addresses
+
+    def _collect_batch(
+        self, prepared: list, addresses: dict, timezones: dict
+    ) -> List[NameResult]:
+        results = []
+        for item in prepared:
+            if isinstance(item, Exception):
+                results.append(NameResult(error=item))
+                continue
+            normal_building_id, formatted_device_function, entity, component = item
+            timezone = timezones[addresses[normal_building_id]]
+            if isinstance(timezone, Exception):
+                results.append(NameResult(error=timezone))
+                continue
+            try:
+                name = self.assemble_name(
+                    normal_building_id,
+                    formatted_device_function,
+                    timezone,
+                    entity,
+                    component,
+                )
+            except Exception as e:
+                results.append(NameResult(error=e))
+                continue
+            results.append(NameResult(name=name))
+        return results
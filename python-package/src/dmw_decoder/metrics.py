@@ -0,0 +1,147 @@
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, Tuple
+
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.0001,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield repr(bound), total
+        yield "+Inf", self.count
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class Metrics:
+    # Collects per-stage durations, HTTP status/latency and cache counters
+    # for a Decoder. A Decoder without one skips all of this.
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, prefix="dmw_decoder"):
+        self.buckets = buckets
+        self.prefix = prefix
+        self.stages: Dict[str, Histogram] = {}
+        self.http: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = Histogram(self.buckets)
+            self.stages[stage].observe(seconds)
+
+    def observe_http(self, status_code: int, seconds: float) -> None:
+        status = str(status_code)
+        with self._lock:
+            if status not in self.http:
+                self.http[status] = Histogram(self.buckets)
+            self.http[status].observe(seconds)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "stages": {
+                    stage: histogram.snapshot()
+                    for stage, histogram in sorted(self.stages.items())
+                },
+                "http": {
+                    status: histogram.snapshot()
+                    for status, histogram in sorted(self.http.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+        self._histogram_lines(
+            lines, f"{self.prefix}_stage_seconds", "stage", snapshot["stages"]
+        )
+        self._histogram_lines(
+            lines, f"{self.prefix}_http_request_seconds", "status", snapshot["http"]
+        )
+        for counter, value in snapshot["counters"].items():
+            name = f"{self.prefix}_{counter}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _histogram_lines(self, lines: list, name: str, label: str, histograms: dict):
+        if not histograms:
+            return
+        lines.append(f"# TYPE {name} histogram")
+        for value, histogram in histograms.items():
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{{label}="{value}"}} {histogram["sum"]}')
+            lines.append(f'{name}_count{{{label}="{value}"}} {histogram["count"]}')
+
+    def write_textfile(self, path) -> None:
+        import tempfile
+
+        # Written to a temporary file first so the node_exporter textfile
+        # collector never reads a half written file
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            file.write(self.to_prometheus())
+        os.replace(file.name, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
+            self.http.clear()
+            self.counters.clear()
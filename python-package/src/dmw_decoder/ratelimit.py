@@ -0,0 +1,80 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    # Client side limiter shared by every thread or task using a Decoder.
+    # rate is requests per second, burst is how many may go back to back.
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("Rate must be greater than zero")
+        if burst < 1:
+            raise ValueError("Burst must be at least one")
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        # Takes a token now and returns how long the caller must wait
+        # before using it
+        with self._lock:
+            now = self.clock()
+            elapsed = now - self._updated_at
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def try_acquire(self) -> bool:
+        # Takes a token only if one is available right now
+        with self._lock:
+            now = self.clock()
+            elapsed = now - self._updated_at
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+            if self._tokens < 1 or self._paused_until > now:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        # Used when the server tells us to back off (429 Retry-After)
+        with self._lock:
+            now = self.clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+
+def retry_after_seconds(headers, default: float = 1.0) -> float:
+    import email.utils
+
+    value: Optional[str] = headers.get("Retry-After")
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,236 @@
+import array
+import bisect
+import csv
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Mapping
+from typing import Callable, Iterator, Optional, Tuple
+
+BUILDING_ID = "Building ID"
+BUILDING_NAME = "Building Name"
+ADDRESS = "Address"
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b"DMWIDX1\n"
+INDEX_HEADER = struct.Struct("<qqII")
+
+
+class Site:
+    # One registry row. Slots keep tens of thousands of these small, and
+    # item access by CSV column name keeps code written against the
+    # DictReader rows from read_csv working.
+    __slots__ = ("building_id", "name", "address")
+    _columns = {BUILDING_ID: "building_id", BUILDING_NAME: "name", ADDRESS: "address"}
+
+    def __init__(self, building_id: str, name: str, address: str):
+        self.building_id = building_id
+        self.name = name
+        self.address = address
+
+    def __getitem__(self, column: str) -> str:
+        try:
+            return getattr(self, self._columns[column])
+        except KeyError:
+            raise KeyError(column)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Site):
+            return NotImplemented
+        return (self.building_id, self.name, self.address) == (
+            other.building_id,
+            other.name,
+            other.address,
+        )
+
+    def __repr__(self) -> str:
+        return f"Site({self.building_id!r}, {self.name!r}, {self.address!r})"
+
+
+def load_sites(path, normalize: Callable[[str], str]) -> dict:
+    # As forgiving as csv.DictReader: blank lines are skipped, the name
+    # column is optional and a BOM from an Excel export is ignored
+    sites = {}
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        id_column = header.index(BUILDING_ID)
+        name_column = header.index(BUILDING_NAME) if BUILDING_NAME in header else None
+        address_column = header.index(ADDRESS)
+        for row in reader:
+            if not row:
+                continue
+            name = "" if name_column is None else row[name_column]
+            building_id = normalize(row[id_column])
+            sites[building_id] = Site(row[id_column], name, row[address_column])
+    return sites
+
+
+class _FixedWidthColumn:
+    # Sequence view over packed fixed-width IDs so bisect can search them
+    # without building a list of strings
+    def __init__(self, data: bytes, width: int):
+        self.data = data
+        self.width = width
+
+    def __len__(self) -> int:
+        return len(self.data) // self.width
+
+    def __getitem__(self, i: int) -> bytes:
+        start = i * self.width
+        return self.data[start : start + self.width]
+
+
+class IndexedSites(Mapping):
+    # Read-only mapping of building ID -> Site backed by an mmap of the CSV
+    # and a sidecar offset index. A lookup parses just the one row it needs.
+    # Rows must not contain line breaks inside quoted fields.
+    def __init__(self, path, id_width: int, normalize: Callable[[str], str], index_path=None):
+        self.path = os.fspath(path)
+        self.id_width = id_width
+        self.normalize = normalize
+        self.index_path = index_path if index_path is not None else self.path + ".idx"
+        self._hits = {}
+        with open(self.path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            self._signature = (stat.st_mtime_ns, stat.st_size)
+            if stat.st_size:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._data = b""
+        header_end = self._line_end(0)
+        header = self._parse_line(0, header_end)
+        self._id_column = header.index(BUILDING_ID)
+        self._name_column = header.index(BUILDING_NAME) if BUILDING_NAME in header else None
+        self._address_column = header.index(ADDRESS)
+        self._body_start = header_end + 1
+        self._ids, self._offsets = self._load_index()
+
+    def _line_end(self, start: int) -> int:
+        end = self._data.find(b"\n", start)
+        return len(self._data) if end == -1 else end
+
+    def _parse_line(self, start: int, end: int) -> list:
+        line = self._data[start:end].decode("utf-8-sig" if start == 0 else "utf-8")
+        return next(csv.reader([line.rstrip("\r")]), [])
+
+    def _load_index(self) -> Tuple[_FixedWidthColumn, array.array]:
+        try:
+            with open(self.index_path, "rb") as file:
+                data = file.read()
+        except OSError:
+            data = b""
+        if data.startswith(INDEX_MAGIC):
+            mtime_ns, size, count, id_width = INDEX_HEADER.unpack_from(
+                data, len(INDEX_MAGIC)
+            )
+            if (mtime_ns, size) == self._signature and id_width == self.id_width:
+                ids_start = len(INDEX_MAGIC) + INDEX_HEADER.size
+                offsets_start = ids_start + count * id_width
+                ids = data[ids_start:offsets_start]
+                offsets = array.array("Q")
+                offsets.frombytes(data[offsets_start:])
+                return _FixedWidthColumn(ids, id_width), offsets
+        return self._build_index()
+
+    def _build_index(self) -> Tuple[_FixedWidthColumn, array.array]:
+        entries = {}
+        start = self._body_start
+        while start < len(self._data):
+            end = self._line_end(start)
+            row = self._parse_line(start, end)
+            if row:
+                building_id = self.normalize(row[self._id_column])
+                if len(building_id) != self.id_width:
+                    raise ValueError(
+                        f"The value {building_id} does not fit the ID width "
+                        f"{self.id_width}"
+                    )
+                # Later rows win, as they do in read_csv
+                entries[building_id.encode("ascii")] = start
+            start = end + 1
+        keys = sorted(entries)
+        ids = b"".join(keys)
+        offsets = array.array("Q", (entries[key] for key in keys))
+        self._save_index(ids, offsets, len(keys))
+        return _FixedWidthColumn(ids, self.id_width), offsets
+
+    def _save_index(self, ids: bytes, offsets: array.array, count: int) -> None:
+        temporary_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "wb") as file:
+                file.write(INDEX_MAGIC)
+                file.write(INDEX_HEADER.pack(*self._signature, count, self.id_width))
+                file.write(ids)
+                file.write(offsets.tobytes())
+            os.replace(temporary_path, self.index_path)
+        except OSError as e:
+            # A read-only location means the index is rebuilt in every
+            # process; Decoder's sites_index_path can point it elsewhere
+            logger.warning("Could not save the site index %s: %s", self.index_path, e)
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    def __getitem__(self, building_id: str) -> Site:
+        site = self._hits.get(building_id)
+        if site is not None:
+            return site
+        key = building_id.encode("ascii", "replace")
+        i = bisect.bisect_left(self._ids, key)
+        if i == len(self._ids) or self._ids[i] != key:
+            raise KeyError(building_id)
+        start = self._offsets[i]
+        row = self._parse_line(start, self._line_end(start))
+        name = "" if self._name_column is None else row[self._name_column]
+        site = Site(row[self._id_column], name, row[self._address_column])
+        self._hits[building_id] = site
+        return site
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self._ids)):
+            yield self._ids[i].decode("ascii")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+class SiteRegistry:
+    # Holds the parsed site table in memory and only reloads it when the
+    # file on disk has been modified (mtime or size changed).
+    def __init__(self, path, loader: Callable[[], Mapping]):
+        self.path = path
+        self.loader = loader
+        self._sites: Optional[Mapping] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def file_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def sites(self) -> Mapping:
+        signature = self.file_signature()
+        if self._sites is None or signature != self._signature:
+            with self._lock:
+                if self._sites is None or signature != self._signature:
+                    previous = self._sites
+                    self._sites = self.loader()
+                    self._signature = signature
+                    # An IndexedSites holds an mmap of the old file
+                    if hasattr(previous, "close"):
+                        previous.close()
+        return self._sites
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._sites = None
+            self._signature = None
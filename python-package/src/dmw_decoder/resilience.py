@@ -0,0 +1,129 @@
+import collections
+import math
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class CircuitOpenError(LookupError):
+    pass
+
+
+class RetryPolicy:
+    # Retries transport errors (timeouts, refused connections) and 5xx
+    # responses with exponential backoff and full jitter, so workers that
+    # failed together do not all come back at the same moment. 429s are
+    # handled separately through rate_limit_retries.
+    def __init__(
+        self,
+        retries: int = 2,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        statuses: Tuple[int, ...] = RETRY_STATUSES,
+        jitter: Optional[Callable[[], float]] = None,
+    ):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = statuses
+        self.jitter = jitter
+
+    def delay(self, failures: int) -> float:
+        if self.jitter is None:
+            import random
+
+            self.jitter = random.random
+        return self.jitter() * min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+
+    def retryable_error(self, error: Exception) -> bool:
+        import httpx
+
+        return isinstance(error, httpx.TransportError)
+
+
+class HedgePolicy:
+    # Sends a second, identical request when the first has taken longer
+    # than the given percentile of recent latencies, and uses whichever
+    # answers first. Until min_samples latencies have been seen there is
+    # nothing to base the delay on, so no hedging happens.
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.01,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("Percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        rank = math.ceil(self.percentile / 100 * len(latencies)) - 1
+        return max(self.min_delay, latencies[rank])
+
+
+class CircuitBreaker:
+    # Stops calling an API that keeps failing. After failure_threshold
+    # failures in a row the circuit opens and calls fail fast with
+    # CircuitOpenError. Once reset_after seconds have passed a single trial
+    # call is let through; success closes the circuit, failure reopens it.
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_after: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("Failure threshold must be at least one")
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self.clock() - self._opened_at >= self.reset_after:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or self.clock() - self._opened_at < self.reset_after:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial = False
@@ -0,0 +1,128 @@
+import re
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .geocoders import COUNTRY_TIMEZONES, REGION_TIMEZONES
+
+DEVICE_FUNCTIONS = {
+    "s": "server",
+    "n": "network",
+    "v": "virtualized",
+    "a": "app",
+    "o": "other",
+}
+DISALLOWED = '\\/:*?"<>|'
+MAX_LENGTH = 15
+ENTITY_MIN_LENGTH = 3
+ENTITY_MAX_LENGTH = 7
+
+
+def known_timezones() -> set:
+    timezones = {"TBD"}
+    timezones.update(timezone for timezone, _ in REGION_TIMEZONES.values())
+    timezones.update(timezone for timezone, _ in COUNTRY_TIMEZONES.values())
+    return timezones
+
+
+class ParsedName(NamedTuple):
+    name: str
+    building_id: str
+    device_function: str
+    timezone: str
+    # Entity and component are written back to back, so they can only be
+    # returned together. The entity is the first 3 to 7 characters.
+    entity_component: str
+
+
+class AuditFinding(NamedTuple):
+    line_number: int
+    name: str
+    errors: tuple
+
+
+class NameDecoder:
+    # Splits names built by Decoder back into their parts. The whole rule
+    # set is compiled into one regular expression, so checking a valid
+    # name is a single fullmatch call.
+    def __init__(
+        self,
+        timezones: Optional[Iterable[str]] = None,
+        building_ids: Optional[Iterable[str]] = None,
+        id_width: int = 2,
+    ):
+        self.timezones = set(timezones) if timezones is not None else known_timezones()
+        self.building_ids = set(building_ids) if building_ids is not None else None
+        self.id_width = id_width
+        # Longest first so e.g. NZST is tried before a shorter abbreviation
+        timezone_pattern = "|".join(
+            re.escape(timezone)
+            for timezone in sorted(self.timezones, key=lambda tz: (-len(tz), tz))
+        )
+        if self.building_ids is not None:
+            building_pattern = "|".join(
+                re.escape(building_id) for building_id in sorted(self.building_ids)
+            )
+        else:
+            building_pattern = rf"\d{{{id_width}}}"
+        allowed = "[^" + re.escape(DISALLOWED) + "]"
+        self.pattern = re.compile(
+            rf"(?=.{{1,{MAX_LENGTH}}}$)"
+            rf"(?P<building_id>{building_pattern})"
+            rf"(?P<device_function>[{''.join(DEVICE_FUNCTIONS)}])"
+            rf"(?P<timezone>{timezone_pattern})"
+            rf"(?P<entity_component>{allowed}{{{ENTITY_MIN_LENGTH},}})"
+        )
+
+    def parse(self, name: str) -> ParsedName:
+        match = self.pattern.fullmatch(name)
+        if match is None:
+            raise ValueError("; ".join(self.explain(name)))
+        return ParsedName(name, *match.groups())
+
+    def is_valid(self, name: str) -> bool:
+        return self.pattern.fullmatch(name) is not None
+
+    def explain(self, name: str) -> list:
+        # Slow path, only used for names that failed the pattern
+        errors = []
+        if any(character in name for character in DISALLOWED):
+            errors.append("Name contains disallowed character")
+        if len(name) < 1:
+            errors.append("Name does not meet minimum length")
+        if len(name) > MAX_LENGTH:
+            errors.append("Name exceeds maximum length")
+        building_id = name[: self.id_width]
+        if not (building_id.isdigit() and len(building_id) == self.id_width):
+            errors.append("Building ID is not zero padded digits")
+        elif self.building_ids is not None and building_id not in self.building_ids:
+            errors.append(f"The value {building_id} is not in lookup csv.")
+        rest = name[self.id_width :]
+        if not rest or rest[0] not in DEVICE_FUNCTIONS:
+            errors.append("Invalid device function")
+            return errors
+        rest = rest[1:]
+        timezone = next(
+            (
+                timezone
+                for timezone in sorted(self.timezones, key=len, reverse=True)
+                if rest.startswith(timezone)
+            ),
+            None,
+        )
+        if timezone is None:
+            errors.append("Unknown timezone")
+        elif len(rest) - len(timezone) < ENTITY_MIN_LENGTH:
+            errors.append("Entity does not meet minimum length")
+        if not errors:
+            errors.append("Name does not match naming convention")
+        return errors
+
+    def audit(self, names: Iterable[str]) -> Iterator[AuditFinding]:
+        match = self.pattern.fullmatch
+        for line_number, name in enumerate(names, start=1):
+            name = name.rstrip("\r\n")
+            if match(name) is None:
+                yield AuditFinding(line_number, name, tuple(self.explain(name)))
+
+    def audit_file(self, path) -> Iterator[AuditFinding]:
+        with open(path) as file:
+            yield from self.audit(file)
@@ -0,0 +1,131 @@
+import itertools
+import math
+import os
+import sys
+from typing import Iterable, List, Optional
+
+from .logic import Decoder, NameResult
+
+# Per worker process: (Decoder, {normal building ID: timezone or None})
+_worker = None
+# Stands in for a site whose geocode failed; the parent holds the error
+SITE_ERROR = "site_error"
+
+# Shards per process; more than one lets the parent collect finished
+# shards while the workers are still busy with the rest
+SHARDS_PER_PROCESS = 4
+
+
+def _init_worker(table: dict, id_width: int) -> None:
+    global _worker
+    # normalize_building_id prints its diagnostics; keep them off stdout,
+    # which may be carrying the results
+    sys.stdout = sys.stderr
+    _worker = (Decoder(api_key="", id_width=id_width), table)
+
+
+def _name_shard(requests: list, issuing: bool) -> list:
+    # Without an issued-name index only the names need to travel back.
+    # Everything returned is pickled, and not every exception survives
+    # that (httpx.HTTPStatusError does not), so a failed site comes back
+    # as (SITE_ERROR, building ID) for the parent to look up.
+    decoder, table = _worker
+    names = []
+    for request in requests:
+        try:
+            building_id, device_function, entity, component = decoder.naming_arguments(
+                request
+            )
+            normal_building_id = decoder.normalize_building_id(building_id)
+            formatted_device_function = decoder.format_device_function(device_function)
+            try:
+                timezone = table[normal_building_id]
+            except KeyError:
+                raise KeyError(f"The value {building_id} is not in lookup csv.")
+            if timezone is None:
+                names.append((SITE_ERROR, normal_building_id))
+                continue
+            final_name, partial_name = decoder.build_name(
+                normal_building_id, formatted_device_function, timezone, entity, component
+            )
+        except Exception as e:
+            names.append(e)
+            continue
+        names.append((final_name, partial_name, component) if issuing else final_name)
+    return names
+
+
+class ShardedNamer:
+    # Bulk naming spread over a process pool. The parent resolves the
+    # timezone of every site once; each worker receives that table when
+    # it starts and then only does validation and string building, so
+    # nothing is re-read or re-geocoded per shard. Results come back in
+    # input order. Issued names are checked in the parent, in order, so
+    # collisions are resolved exactly as Decoder.create_names would.
+    def __init__(self, decoder: Decoder, processes: Optional[int] = None):
+        self.decoder = decoder
+        self.processes = processes or os.cpu_count() or 1
+        self._table: Optional[dict] = None
+        self._site_errors: dict = {}
+        self._executor = None
+
+    def site_table(self) -> dict:
+        # Workers get only the timezones; geocoding errors stay here
+        if self._table is None:
+            table = {}
+            for building_id, timezone in self.decoder.site_timezones().items():
+                if isinstance(timezone, Exception):
+                    self._site_errors[building_id] = timezone
+                    timezone = None
+                table[building_id] = timezone
+            self._table = table
+        return self._table
+
+    def executor(self):
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=_init_worker,
+                initargs=(self.site_table(), self.decoder.id_width),
+            )
+        return self._executor
+
+    def create_names(self, requests: Iterable) -> List[NameResult]:
+        requests = list(requests)
+        if not requests:
+            return []
+        executor = self.executor()
+        shard_size = math.ceil(len(requests) / (self.processes * SHARDS_PER_PROCESS))
+        shards = [
+            requests[start : start + shard_size]
+            for start in range(0, len(requests), shard_size)
+        ]
+        issuing = self.decoder.issued_names is not None
+        results = []
+        for names in executor.map(_name_shard, shards, itertools.repeat(issuing)):
+            for item in names:
+                if isinstance(item, Exception):
+                    results.append(NameResult(error=item))
+                elif isinstance(item, tuple) and item[0] == SITE_ERROR:
+                    results.append(NameResult(error=self._site_errors[item[1]]))
+                elif not issuing:
+                    results.append(NameResult(name=item))
+                else:
+                    try:
+                        results.append(NameResult(name=self.decoder.issue_name(*item)))
+                    except Exception as e:
+                        results.append(NameResult(error=e))
+        return results
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,71 @@
+import threading
+import weakref
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution: the first
+    # caller runs func, the rest wait for it and get the same result or
+    # exception. Nothing is kept once the call finishes; remembering
+    # answers is the cache's job.
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args) -> Any:
+        result, _ = self.do_shared(key, func, *args)
+        return result
+
+    def do_shared(self, key: Hashable, func: Callable, *args) -> tuple:
+        # Also returns whether the result came from another caller's call
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = func(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AsyncSingleFlight:
+    # asyncio version of SingleFlight. Futures belong to an event loop, so
+    # in-flight calls are tracked per loop.
+    def __init__(self):
+        self._loops = weakref.WeakKeyDictionary()
+
+    async def do(self, key: Hashable, func: Callable, *args) -> Any:
+        result, _ = await self.do_shared(key, func, *args)
+        return result
+
+    async def do_shared(self, key: Hashable, func: Callable, *args) -> tuple:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        calls = self._loops.setdefault(loop, {})
+        task = calls.get(key)
+        shared = task is not None
+        if not shared:
+            task = calls[key] = loop.create_task(func(*args))
+            task.add_done_callback(lambda _: calls.pop(key, None))
+        # A waiter that is cancelled must not cancel the call for the others
+        return await asyncio.shield(task), shared
@@ -0,0 +1,205 @@
+import argparse
+import importlib.resources
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .reverse import DEVICE_FUNCTIONS, MAX_LENGTH
+
+INDEX_VERSION = 1
+DEFAULT_INDEX = importlib.resources.files("dmw_decoder.data") / "site_index.json"
+
+
+class SiteIndex:
+    # Precomputed building ID -> address, timezone and confidence, so that
+    # names can be created without geocoding at runtime
+    def __init__(self, sites: Optional[dict] = None):
+        self.sites = sites if sites is not None else {}
+        self._by_address = {
+            site["address"]: site["timezone"] for site in self.sites.values()
+        }
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX) -> "SiteIndex":
+        with open(path) as file:
+            data = json.load(file)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported site index version {data.get('version')}")
+        return cls(data["sites"])
+
+    def save(self, path=DEFAULT_INDEX) -> None:
+        data = {"version": INDEX_VERSION, "sites": self.sites}
+        with open(path, "w") as file:
+            json.dump(data, file, separators=(",", ":"), sort_keys=True)
+
+    def timezone(self, address: str) -> Optional[str]:
+        # Looked up by address rather than building ID so an index built
+        # before an address changed in the CSV is ignored for that site
+        return self._by_address.get(address)
+
+    def __len__(self) -> int:
+        return len(self.sites)
+
+
+@dataclass
+class RefreshReport:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # Building ID -> (old timezone, new timezone)
+    timezone_changes: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    # Issued name -> the name the same request would get now, or None when
+    # its building is no longer in the CSV
+    affected_names: Dict[str, Optional[str]] = field(default_factory=dict)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    geocoded: int = 0
+
+
+def build_site_index(decoder, max_workers: int = 4) -> tuple:
+    index, report = refresh_site_index(decoder, SiteIndex(), max_workers=max_workers)
+    return index, report.errors
+
+
+def refresh_site_index(
+    decoder, previous: SiteIndex, issued_names=None, max_workers: int = 4
+) -> tuple:
+    # Diffs the CSV against the previous index by building ID and address.
+    # Rows whose address is unchanged keep their entry; only new and moved
+    # buildings are geocoded, so a sync costs as much as the diff.
+    from concurrent.futures import ThreadPoolExecutor
+
+    sites = decoder.registry.sites()
+    report = RefreshReport()
+    index = {}
+    addresses = {}
+    for building_id, site in sites.items():
+        entry = previous.sites.get(building_id)
+        if entry is None:
+            report.added.append(building_id)
+        elif entry["address"] != site["Address"]:
+            report.changed.append(building_id)
+        else:
+            index[building_id] = entry
+            continue
+        addresses[building_id] = site["Address"]
+    report.removed = [building_id for building_id in previous.sites if building_id not in sites]
+
+    def lookup(address):
+        try:
+            return decoder.geocoder.lookup(address)
+        except Exception as e:
+            return e
+
+    unique_addresses = sorted(set(addresses.values()))
+    report.geocoded = len(unique_addresses)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(unique_addresses, executor.map(lookup, unique_addresses)))
+
+    for building_id, address in sorted(addresses.items()):
+        result = results[address]
+        if not isinstance(result, Exception):
+            try:
+                timezone = decoder.timezone_from_result(address, result)
+            except LookupError as e:
+                result = e
+        if isinstance(result, Exception):
+            report.errors[building_id] = result
+            continue
+        index[building_id] = {
+            "address": address,
+            "timezone": timezone,
+            "confidence": result.confidence,
+        }
+        old_entry = previous.sites.get(building_id)
+        if old_entry is not None and old_entry["timezone"] != timezone:
+            report.timezone_changes[building_id] = (old_entry["timezone"], timezone)
+
+    if issued_names is not None:
+        report.affected_names = affected_names(previous, report, issued_names)
+    report.added.sort()
+    report.changed.sort()
+    report.removed.sort()
+    return SiteIndex(index), report
+
+
+def affected_names(previous: SiteIndex, report: RefreshReport, issued_names) -> dict:
+    # Issued names are keyed by the full requested name, which starts with
+    # building ID, function letter and timezone, so the names under a
+    # building are found with one prefix query per function
+    timezones = dict(report.timezone_changes)
+    for building_id in report.removed:
+        timezones[building_id] = (previous.sites[building_id]["timezone"], None)
+    affected = {}
+    for building_id, (old_timezone, new_timezone) in sorted(timezones.items()):
+        for function in DEVICE_FUNCTIONS:
+            old_prefix = f"{building_id}{function}{old_timezone}"
+            for name, key in issued_names.by_key_prefix(old_prefix):
+                if new_timezone is None:
+                    affected[name] = None
+                else:
+                    new_key = f"{building_id}{function}{new_timezone}{key[len(old_prefix):]}"
+                    affected[name] = new_key[:MAX_LENGTH]
+    return affected
+
+
+def main(argv=None) -> int:
+    from .logic import Decoder
+
+    parser = argparse.ArgumentParser(
+        description="Geocode every building once and write a precomputed site index"
+    )
+    parser.add_argument("--site-csv", default=None, help="defaults to the packaged CSV")
+    parser.add_argument("--output", default=str(DEFAULT_INDEX))
+    parser.add_argument("--api-key", default=os.getenv("DMW_DECODER_API_KEY"))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="only geocode buildings added or moved since the existing output",
+    )
+    parser.add_argument(
+        "--issued-names", default=None, help="report issued names a refresh would change"
+    )
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or DMW_DECODER_API_KEY)")
+
+    if args.site_csv is None:
+        decoder = Decoder(api_key=args.api_key)
+    else:
+        decoder = Decoder(api_key=args.api_key, site_csv=args.site_csv)
+    previous = SiteIndex()
+    if args.refresh and os.path.exists(args.output):
+        previous = SiteIndex.load(args.output)
+    issued_names = None
+    if args.issued_names is not None:
+        from .issued import IssuedNames
+
+        issued_names = IssuedNames(args.issued_names)
+    index, report = refresh_site_index(
+        decoder, previous, issued_names=issued_names, max_workers=args.workers
+    )
+    index.save(args.output)
+    for building_id, error in report.errors.items():
+        print(f"Building {building_id} was not indexed: {error}", file=sys.stderr)
+    if args.refresh:
+        print(
+            f"{len(report.added)} added, {len(report.changed)} changed, "
+            f"{len(report.removed)} removed, {report.geocoded} geocoded",
+            file=sys.stderr,
+        )
+        for building_id, (old_timezone, new_timezone) in report.timezone_changes.items():
+            print(
+                f"Building {building_id} timezone {old_timezone} -> {new_timezone}",
+                file=sys.stderr,
+            )
+        for name, new_name in report.affected_names.items():
+            print(f"Issued name {name} -> {new_name or 'building removed'}", file=sys.stderr)
+    print(f"Wrote {len(index)} sites to {args.output}")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
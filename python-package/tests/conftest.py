@@ -0,0 +1,43 @@
+import re
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture()
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture()
+def two_site_csv(tmp_path):
+    filename = tmp_path / "sites.csv"
+    filename.write_text(
+        'Building Name,Building ID,Address\n'
+        'HQ,1,"625 W Adams St, Chicago, IL  60661, United States"\n'
+        'Aran,2,"2 Chome-5-8 Higashishinagawa, Shinagawa City, Tokyo 140-0002, Japan"\n'
+    )
+    return filename
+
+
+@pytest.fixture()
+def timezone_responses(httpx_mock):
+    # Answers for two_site_csv; Tokyo is below the confidence cut-off
+    httpx_mock.add_response(
+        url=re.compile(r".*Adams.*"),
+        json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]},
+    )
+    httpx_mock.add_response(
+        url=re.compile(r".*Tokyo.*"),
+        json={"results": [{"timezone": {"abbreviation_STD": "JST"}, "rank": {"confidence": 0.3}}]},
+    )
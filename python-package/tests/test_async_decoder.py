@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from src.dmw_decoder.async_decoder import AsyncDecoder
+from src.dmw_decoder.issued import IssuedNames, NameCollisionError
+from src.dmw_decoder.logic import Decoder
+
+
+requests = [
+    ("1", "server", "web", "-01"),
+    ("2", "virtualized", "csr", "-01-temp"),
+    ("1", "cluster", "web", "-01"),
+    ("1", "app", "crm", "-primary"),
+]
+
+
+def test_async_create_netbios_compatible_name(two_site_csv, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        json={"results": [{"timezone": {"abbreviation_STD": "JST"}, "rank": {"confidence": 0.2}}]},
+    )
+
+    async def main():
+        async with AsyncDecoder(api_key='', site_csv=two_site_csv) as decode:
+            return await decode.create_netbios_compatible_name("2", "virtualized", "csr", "-01-temp")
+
+    assert asyncio.run(main()) == "02vTBDcsr-01-te"
+
+
+def test_async_create_names_matches_sync(two_site_csv, timezone_responses):
+    async def main():
+        async with AsyncDecoder(api_key='', site_csv=two_site_csv, max_concurrency=1) as decode:
+            return await decode.create_names(requests)
+
+    async_results = asyncio.run(main())
+    with httpx.Client() as mock_client:
+        sync_results = Decoder(api_key='', site_csv=two_site_csv, client=mock_client).create_names(requests)
+    assert [r.name for r in async_results] == [r.name for r in sync_results]
+    assert [type(r.error) for r in async_results] == [type(r.error) for r in sync_results]
+    assert [r.name for r in async_results] == ["01sCSTweb-01", "02vTBDcsr-01-te", None, "01aCSTcrm-prima"]
+
+
+def test_async_concurrency_is_bounded(two_site_csv):
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(
+            200, json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]}
+        )
+
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncDecoder(api_key='', site_csv=two_site_csv, client=client, max_concurrency=2) as decode:
+            return await decode.resolve_timezones([f"address {i}" for i in range(6)])
+
+    timezones = asyncio.run(main())
+    assert set(timezones.values()) == {"CST"}
+    assert peak == 2
+
+
+def test_async_warm_up(two_site_csv, httpx_mock: HTTPXMock, timezone_responses):
+    async def main():
+        async with AsyncDecoder(api_key='', site_csv=two_site_csv) as decode:
+            assert await decode.warm_up() == 2
+            return [await decode.create_netbios_compatible_name(*request) for request in requests[:2]]
+
+    assert asyncio.run(main()) == ["01sCSTweb-01", "02vTBDcsr-01-te"]
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_async_issued_names_and_wide_ids(tmp_path, httpx_mock: HTTPXMock):
+    site_csv = tmp_path / "sites.csv"
+    site_csv.write_text('Building Name,Building ID,Address\nHQ,123,"625 W Adams St, Chicago, IL 60661"\n')
+    httpx_mock.add_response(
+        json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]},
+    )
+
+    async def main():
+        async with AsyncDecoder(
+            api_key='', site_csv=site_csv, id_width=3, indexed_sites=True, issued_names=IssuedNames()
+        ) as decode:
+            first = await decode.create_netbios_compatible_name("123", "server", "web", "-temp-fl2-goofy")
+            with pytest.raises(NameCollisionError):
+                await decode.create_netbios_compatible_name("123", "server", "web", "-temp-fl2-silly")
+            results = await decode.create_names([("123", "server", "web", "-temp-fl2-silly")])
+            return first, results[0].error
+
+    first, error = asyncio.run(main())
+    assert first == "123sCSTweb-temp"
+    assert isinstance(error, NameCollisionError)
+
+
+def test_aclose_leaves_a_passed_in_client_open():
+    async def main():
+        async with httpx.AsyncClient() as shared:
+            async with AsyncDecoder(api_key='', client=shared) as decode:
+                decode.close()
+            assert not shared.is_closed
+        decode = AsyncDecoder(api_key='')
+        own = decode.client
+        await decode.aclose()
+        return own.is_closed
+
+    assert asyncio.run(main())
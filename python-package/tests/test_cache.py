@@ -0,0 +1,132 @@
+import multiprocessing
+import threading
+import time
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from src.dmw_decoder.cache import GeocodeCache
+from src.dmw_decoder.geocoders import GeocodeResult, Geocoder
+from src.dmw_decoder.logic import Decoder
+
+
+def test_normalize_address():
+    assert (
+        GeocodeCache.normalize_address(" 625 W Adams St,Chicago, IL  60661 ")
+        == "625 w adams st, chicago, il 60661"
+    )
+
+
+def test_cache_get_and_set():
+    cache = GeocodeCache()
+    assert cache.get("625 W Adams St") is None
+    cache.set("625 W Adams St", "CST")
+    assert cache.get("625  w adams st") == "CST"
+    assert len(cache) == 1
+
+
+def test_cache_ttl_and_negative_ttl(clock):
+    cache = GeocodeCache(ttl=100, negative_ttl=10, clock=clock)
+    cache.set("good", "CST")
+    cache.set("vague", "TBD")
+    clock.now += 11
+    assert cache.get("good") == "CST"
+    assert cache.get("vague") is None
+    clock.now += 90
+    assert cache.get("good") is None
+
+
+def test_cache_evicts_least_recently_used(clock):
+    cache = GeocodeCache(max_entries=2, clock=clock)
+    cache.set("one", "CST")
+    clock.now += 1
+    cache.set("two", "MST")
+    clock.now += 1
+    assert cache.get("one") == "CST"
+    clock.now += 1
+    cache.set("three", "PST")
+    assert len(cache) == 2
+    assert cache.get("two") is None
+    assert cache.get("one") == "CST"
+
+
+def test_cache_is_shared_between_instances(tmp_path):
+    path = tmp_path / "geocode.sqlite"
+    GeocodeCache(path).set("address", "JST")
+    assert GeocodeCache(path).get("address") == "JST"
+
+
+def test_get_timezone_by_address_uses_cache(httpx_mock: HTTPXMock):
+    mocked_response = {
+        "results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]
+    }
+    httpx_mock.add_response(json=mocked_response)
+    with httpx.Client() as mock_client:
+        decode = Decoder(api_key="", client=mock_client, cache=GeocodeCache())
+        assert decode.get_timezone_by_address("address") == "CST"
+        assert decode.get_timezone_by_address("ADDRESS") == "CST"
+    assert len(httpx_mock.get_requests()) == 1
+
+
+class SlowGeocoder(Geocoder):
+    def __init__(self, log_path):
+        self.log_path = log_path
+
+    def lookup(self, address):
+        with open(self.log_path, "a") as log:
+            log.write(address + "\n")
+        time.sleep(0.2)
+        return GeocodeResult("CST", 1.0)
+
+
+def name_in_process(cache_path, log_path, address, start):
+    start.wait()
+    decode = Decoder(api_key="", cache=GeocodeCache(cache_path), geocoder=SlowGeocoder(log_path))
+    assert decode.get_timezone_by_address(address) == "CST"
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+)
+def test_processes_sharing_a_cache_look_up_each_address_once(tmp_path):
+    context = multiprocessing.get_context("fork")
+    cache_path = str(tmp_path / "geocode.sqlite")
+    log_path = tmp_path / "lookups.log"
+    GeocodeCache(cache_path).close()
+    start = context.Event()
+    addresses = ["625 W Adams St", "625 w adams st", "206 E 13th Ave"] * 3
+    processes = [
+        context.Process(target=name_in_process, args=(cache_path, log_path, address, start))
+        for address in addresses
+    ]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(10)
+    assert [process.exitcode for process in processes] == [0] * len(addresses)
+    lookups = log_path.read_text().lower().splitlines()
+    assert sorted(lookups) == ["206 e 13th ave", "625 w adams st"]
+
+
+def test_memory_cache_is_not_shared():
+    cache = GeocodeCache()
+    assert not cache.shared
+    with cache.locked("anything"):
+        pass
+
+
+def test_threads_sharing_a_slot_wait_for_each_other(tmp_path):
+    cache = GeocodeCache(tmp_path / "cache.sqlite")
+    entered = threading.Event()
+    with cache.locked("625 W Adams St"):
+        def wait_for_lock():
+            with cache.locked("625 w adams st"):
+                entered.set()
+
+        thread = threading.Thread(target=wait_for_lock)
+        thread.start()
+        assert not entered.wait(0.1)
+    thread.join(timeout=5)
+    assert entered.is_set()
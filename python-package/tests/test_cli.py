@@ -0,0 +1,84 @@
+import io
+import json
+
+from src.dmw_decoder.cli import JsonlWriter, main, name_stream, read_jsonl
+from src.dmw_decoder.logic import Decoder
+
+
+def test_name_jsonl_file(tmp_path, capsys):
+    input_file = tmp_path / "requests.jsonl"
+    input_file.write_text(
+        '{"building_id": "22", "device_function": "app", "entity": "crm", "component": "-01"}\n'
+        '\n'
+        '["1", "server", "x", "-01"]\n'
+        '["abc", "server", "web", "-01"]\n'
+        'not json\n'
+    )
+    output_file = tmp_path / "names.jsonl"
+    exit_code = main(["name", str(input_file), "-o", str(output_file), "--geocoder", "local"])
+    assert exit_code == 1
+    records = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [record["name"] for record in records] == ["22aMSTcrm-01", None, None, None]
+    assert records[0]["error"] is None
+    assert records[1]["error"] == "Name does not meet minimum length"
+    assert records[2]["building_id"] == "abc"
+    assert records[3]["error"].startswith("Invalid JSON")
+    assert "3 requests could not be named" in capsys.readouterr().err
+
+
+def test_name_csv_stdin_to_stdout(monkeypatch, capsys):
+    monkeypatch.setattr(
+        "sys.stdin",
+        io.StringIO("building_id,device_function,entity,component\n7,network,core,-sw01\n"),
+    )
+    exit_code = main(["name", "--input-format", "csv", "--geocoder", "local"])
+    assert exit_code == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "building_id,device_function,entity,component,name,error",
+        "7,network,core,-sw01,07nPSTcore-sw01,",
+    ]
+
+
+def test_name_stream_is_chunked():
+    class CountingDecoder(Decoder):
+        batches = []
+
+        def create_names(self, requests):
+            self.batches.append(len(requests))
+            return super().create_names(requests)
+
+    decoder = CountingDecoder(api_key="", geocoder="local")
+    requests = read_jsonl(io.StringIO('["22", "app", "crm", "-01"]\n' * 5))
+    output = io.StringIO()
+    assert name_stream(decoder, requests, JsonlWriter(output), chunk_size=2) == 0
+    assert decoder.batches == [2, 2, 1]
+    assert len(output.getvalue().splitlines()) == 5
+
+
+def test_name_disambiguates_across_runs(tmp_path):
+    input_file = tmp_path / "requests.jsonl"
+    output_file = tmp_path / "names.jsonl"
+    issued = tmp_path / "issued.db"
+    arguments = ["name", str(input_file), "-o", str(output_file), "--geocoder", "local"]
+    input_file.write_text('["1", "server", "web", "-temp-fl2-goofy"]\n')
+    assert main(arguments + ["--issued-names", str(issued)]) == 0
+    input_file.write_text('["1", "server", "web", "-temp-fl2-silly"]\n')
+    assert main(arguments + ["--issued-names", str(issued)]) == 1
+    assert "already issued" in json.loads(output_file.read_text())["error"]
+    assert main(arguments + ["--issued-names", str(issued), "--disambiguate"]) == 0
+    assert json.loads(output_file.read_text())["name"] == "01sCSTweb-temp2"
+
+
+def test_name_jsonl_numeric_fields():
+    requests = read_jsonl(
+        io.StringIO(
+            '{"building_id": 22, "device_function": "app", "entity": "crm", "component": 1}\n'
+            '[7, "network", "core", -1]\n'
+        )
+    )
+    output = io.StringIO()
+    decoder = Decoder(api_key="", geocoder="local")
+    assert name_stream(decoder, requests, JsonlWriter(output)) == 0
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record["name"] for record in records] == ["22aMSTcrm1", "07nPSTcore-1"]
+    assert records[0]["building_id"] == "22"
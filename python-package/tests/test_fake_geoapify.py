@@ -0,0 +1,186 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.dmw_decoder import logic
+from src.dmw_decoder.async_decoder import AsyncDecoder
+from src.dmw_decoder.cache import GeocodeCache
+from benchmarks.fake_geoapify import FakeGeoapify
+from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.resilience import RetryPolicy
+
+
+@pytest.fixture()
+def fake():
+    with FakeGeoapify(seed=1) as server:
+        yield server
+
+
+def test_decoder_against_stand_in(fake):
+    with Decoder(api_key="key", base_url=fake.url + "/") as decode:
+        assert decode.geocode_url("x").startswith(fake.url + "/v1/geocode/search?text=x")
+        assert decode.get_timezone_by_address("625 W Adams St, Chicago, IL 60661") == "CST"
+        assert decode.get_timezone_by_address("Shinagawa City, Tokyo 140-0002, Japan") == "JST"
+        # Florida spans two timezones, so confidence is low
+        assert decode.get_timezone_by_address("1 Main St, Miami, FL 33101") == "TBD"
+        with pytest.raises(LookupError):
+            decode.get_timezone_by_address("nowhere in particular")
+    assert fake.status_counts == {200: 4}
+
+
+def test_stand_in_response_shape(fake):
+    response = httpx.get(fake.url + "/v1/geocode/search", params={"text": "Chicago, IL 60661", "limit": 2})
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert results[0]["timezone"]["abbreviation_STD"] == "CST"
+    assert results[0]["rank"]["confidence"] > results[1]["rank"]["confidence"]
+    assert httpx.get(fake.url + "/v1/geocode/search").status_code == 400
+    assert httpx.get(fake.url + "/elsewhere").status_code == 404
+
+
+def test_stand_in_confidence_and_errors():
+    with FakeGeoapify(confidence=0.3) as fake:
+        with Decoder(api_key="key", base_url=fake.url) as decode:
+            assert decode.get_timezone_by_address("Chicago, IL 60661") == "TBD"
+    with FakeGeoapify(error_rate=1.0) as fake:
+        with Decoder(
+            api_key="key", base_url=fake.url, retry=RetryPolicy(retries=2, base_delay=0)
+        ) as decode:
+            with pytest.raises(httpx.HTTPStatusError):
+                decode.get_timezone_by_address("Chicago, IL 60661")
+        assert fake.status_counts == {500: 3}
+
+
+def test_stand_in_rate_limit():
+    with FakeGeoapify(rate_limit=1) as fake:
+        statuses = [
+            httpx.get(fake.url + "/v1/geocode/search", params={"text": "Chicago, IL 60661"})
+            for _ in range(3)
+        ]
+    assert [response.status_code for response in statuses] == [200, 429, 429]
+    assert statuses[1].headers["Retry-After"] == "1"
+
+
+def test_lean_lookup(fake):
+    with Decoder(api_key="k&y", base_url=fake.url, lean=True) as decode:
+        assert decode.geocode_url("1 A St #2, Chicago, IL 60661") == (
+            f"{fake.url}/v1/geocode/search?text=1+A+St+%232%2C+Chicago%2C+IL+60661"
+            "&format=json&limit=1&apiKey=k%26y"
+        )
+        assert decode.geo_lookup_by_address("1 A St #2, Chicago, IL 60661") == {
+            "results": [{"rank": {"confidence": 1.0}, "timezone": {"abbreviation_STD": "CST"}}]
+        }
+        assert decode.get_timezone_by_address("Shinagawa City, Tokyo 140-0002, Japan") == "JST"
+        assert decode.geo_lookup_by_address("nowhere in particular") == {"results": []}
+        assert decode.client.headers["Accept-Encoding"].startswith("gzip")
+
+
+def test_stand_in_compresses_large_bodies(fake):
+    response = httpx.get(fake.url + "/v1/geocode/search", params={"text": "Chicago, IL 60661"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()["results"]) == 5
+    response = httpx.get(
+        fake.url + "/v1/geocode/search",
+        params={"text": "Chicago, IL 60661"},
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.fixture()
+def site_csv(tmp_path):
+    filename = tmp_path / "sites.csv"
+    filename.write_text(
+        "Building Name,Building ID,Address\n"
+        'HQ,1,"625 W Adams St, Chicago, IL 60661"\n'
+        'Annex,2,"625 W Adams St, Chicago, IL 60661"\n'
+        'Aran,3,"Shinagawa City, Tokyo 140-0002, Japan"\n'
+        'Beach,4,"1 Main St, Miami, FL 33101"\n'
+        'Lost,5,"nowhere in particular"\n'
+    )
+    return filename
+
+
+def test_batch_warm_up(site_csv, monkeypatch):
+    monkeypatch.setattr(logic, "BATCH_SIZE", 2)
+    with FakeGeoapify(batch_delay=0.05) as fake:
+        with Decoder(
+            api_key="key",
+            site_csv=site_csv,
+            base_url=fake.url,
+            cache=GeocodeCache(),
+            batch_poll_interval=0.02,
+        ) as decode:
+            timezones = decode.site_timezones(batch=True)
+            assert {building_id: timezones[building_id] for building_id in ("01", "02", "03", "04")} == {
+                "01": "CST",
+                "02": "CST",
+                "03": "JST",
+                "04": "TBD",
+            }
+            assert isinstance(timezones["05"], LookupError)
+            assert decode.cache.get("Shinagawa City, Tokyo 140-0002, Japan") == "JST"
+            assert decode.warm_up(batch=True) == 4
+            assert decode.create_netbios_compatible_name("3", "server", "web", "-01") == "03sJSTweb-01"
+    # Four unique addresses in jobs of two, each polled until done; the
+    # second warm-up only asks again for the address that failed
+    assert len(fake.jobs) == 3
+    assert fake.status_counts[200] == 3
+    assert fake.requests < 20
+
+
+def test_batch_results_match_single_lookups(site_csv):
+    with FakeGeoapify() as fake:
+        with Decoder(api_key="key", site_csv=site_csv, base_url=fake.url) as decode:
+            batched = decode.site_timezones(batch=True)
+            single = decode.site_timezones()
+    assert batched["01"] == single["01"] == "CST"
+    assert [str(timezone) for timezone in batched.values()] == [
+        str(timezone) for timezone in single.values()
+    ]
+    assert isinstance(single["05"], LookupError)
+
+
+def test_batch_timeout(site_csv):
+    with FakeGeoapify(batch_delay=10) as fake:
+        with Decoder(
+            api_key="key",
+            site_csv=site_csv,
+            base_url=fake.url,
+            batch_poll_interval=0.01,
+            batch_timeout=0.05,
+        ) as decode:
+            timezones = decode.batch_timezones(["Chicago, IL 60661"])
+    assert isinstance(timezones["Chicago, IL 60661"], TimeoutError)
+
+
+def test_stand_in_batch_endpoint(fake):
+    assert httpx.post(fake.url + "/v1/batch/geocode/search", json={"text": "x"}).status_code == 400
+    assert httpx.get(fake.url + "/v1/batch/geocode/search", params={"id": "nope"}).status_code == 404
+
+
+def test_async_batch_warm_up(site_csv):
+    async def main(url):
+        async with AsyncDecoder(
+            api_key="key", site_csv=site_csv, base_url=url, batch_poll_interval=0.01
+        ) as decode:
+            timezones = await decode.site_timezones(batch=True)
+            assert await decode.warm_up(batch=True) == 4
+            return timezones, await decode.create_netbios_compatible_name("3", "server", "web", "-01")
+
+    with FakeGeoapify(batch_delay=0.02) as fake:
+        timezones, name = asyncio.run(main(fake.url))
+        assert len(fake.jobs) == 2
+    assert timezones["01"] == "CST"
+    assert isinstance(timezones["05"], LookupError)
+    assert name == "03sJSTweb-01"
+
+
+def test_async_decoder_close_needs_aclose(fake):
+    decode = AsyncDecoder(api_key="key", base_url=fake.url)
+    decode.close()
+    decode.client
+    with pytest.raises(TypeError, match="aclose"):
+        decode.close()
+    asyncio.run(decode.aclose())
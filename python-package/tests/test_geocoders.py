@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from src.dmw_decoder.geocoders import (
+    ChainedGeocoder,
+    GeoapifyGeocoder,
+    GeocodeResult,
+    Geocoder,
+    LocalGeocoder,
+)
+from src.dmw_decoder.async_decoder import AsyncDecoder
+from src.dmw_decoder.logic import Decoder
+
+
+class StaticGeocoder(Geocoder):
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def lookup(self, address):
+        self.calls += 1
+        return self.result
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    [
+        ("625 W Adams St, Chicago, IL  60661, United States", GeocodeResult("CST", 1.0)),
+        ("206 E 13th Ave, Denver, CO 80203", GeocodeResult("MST", 1.0)),
+        ("3070 Limestone Way Suite C, Paso Robles, CA 93446", GeocodeResult("PST", 1.0)),
+        ("530 Robson St, Vancouver, BC V6B 2B7, Canada", GeocodeResult("PST", 1.0)),
+        ("94 St Aldate's, Oxford OX1 1BT, United Kingdom", GeocodeResult("GMT", 1.0)),
+        ("2 Chome-5-8 Higashishinagawa, Shinagawa City, Tokyo 140-0002, Japan", GeocodeResult("JST", 1.0)),
+        ("2655 South Park Ave, Buffalo, NY 14218", GeocodeResult("EST", 1.0)),
+        ("100 Main St, El Paso, TX 79901", GeocodeResult("CST", 0.4)),
+        ("Somewhere, Atlantis", None),
+    ],
+)
+def test_local_geocoder(address, expected):
+    assert LocalGeocoder().lookup(address) == expected
+
+
+def test_local_geocoder_overrides():
+    geocoder = LocalGeocoder(
+        region_timezones={("US", "TX"): ("CST", 1.0)},
+        country_names={"atlantis": "AT"},
+    )
+    assert geocoder.lookup("100 Main St, Dallas, TX 75201") == GeocodeResult("CST", 1.0)
+    assert geocoder.lookup("Somewhere, Atlantis") == GeocodeResult("CET", 1.0)
+
+
+def test_geoapify_geocoder_parse():
+    geo_data = {"results": [{"timezone": {"abbreviation_STD": "JST"}, "rank": {"confidence": 0.9}}]}
+    assert GeoapifyGeocoder.parse(geo_data) == GeocodeResult("JST", 0.9)
+    assert GeoapifyGeocoder(fetch=lambda address: geo_data).lookup("x") == GeocodeResult("JST", 0.9)
+    with pytest.raises(TypeError):
+        GeoapifyGeocoder().lookup("x")
+    assert GeoapifyGeocoder.parse({"results": []}) is None
+    assert GeoapifyGeocoder.parse({"results": [{"query": {"text": "x"}}]}) is None
+
+
+def test_chained_geocoder_keeps_fallback_when_a_later_geocoder_fails():
+    class FailingGeocoder(Geocoder):
+        def lookup(self, address):
+            raise ConnectionError("down")
+
+    unsure = StaticGeocoder(GeocodeResult("CST", 0.4))
+    chained = ChainedGeocoder(unsure, FailingGeocoder())
+    assert chained.lookup("x") == GeocodeResult("CST", 0.4)
+    assert asyncio.run(chained.alookup("x")) == GeocodeResult("CST", 0.4)
+    with pytest.raises(ConnectionError):
+        ChainedGeocoder(StaticGeocoder(None), FailingGeocoder()).lookup("x")
+
+
+def test_chained_geocoder_prefers_first_confident_answer():
+    local = StaticGeocoder(GeocodeResult("CST", 1.0))
+    remote = StaticGeocoder(GeocodeResult("EST", 1.0))
+    assert ChainedGeocoder(local, remote).lookup("x") == GeocodeResult("CST", 1.0)
+    assert remote.calls == 0
+
+
+def test_chained_geocoder_falls_through():
+    unsure = StaticGeocoder(GeocodeResult("CST", 0.4))
+    missing = StaticGeocoder(None)
+    assert ChainedGeocoder(unsure, missing).lookup("x") == GeocodeResult("CST", 0.4)
+    remote = StaticGeocoder(GeocodeResult("MST", 1.0))
+    assert ChainedGeocoder(missing, unsure, remote).lookup("x") == GeocodeResult("MST", 1.0)
+    assert asyncio.run(ChainedGeocoder(missing, remote).alookup("x")) == GeocodeResult("MST", 1.0)
+
+
+def test_decoder_with_local_geocoder(httpx_mock: HTTPXMock):
+    decode = Decoder(api_key='', site_csv='src/dmw_decoder/data/Buildings.csv', geocoder="local")
+    assert decode.create_netbios_compatible_name("22", "app", "crm", "-01") == "22aMSTcrm-01"
+    with pytest.raises(LookupError):
+        decode.get_timezone_by_address("Somewhere, Atlantis")
+    assert len(httpx_mock.get_requests()) == 0
+
+
+def test_decoder_with_chained_geocoder(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        json={"results": [{"timezone": {"abbreviation_STD": "MST"}, "rank": {"confidence": 1}}]}
+    )
+    with httpx.Client() as mock_client:
+        decode = Decoder(api_key='', client=mock_client, geocoder="chained")
+        assert decode.get_timezone_by_address("625 W Adams St, Chicago, IL  60661") == "CST"
+        assert decode.get_timezone_by_address("100 Main St, El Paso, TX 79901") == "MST"
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_async_decoder_with_chained_geocoder(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        json={"results": [{"timezone": {"abbreviation_STD": "MST"}, "rank": {"confidence": 1}}]}
+    )
+
+    async def main():
+        async with AsyncDecoder(api_key='', geocoder="chained") as decode:
+            return [
+                await decode.get_timezone_by_address("625 W Adams St, Chicago, IL  60661"),
+                await decode.get_timezone_by_address("100 Main St, El Paso, TX 79901"),
+            ]
+
+    assert asyncio.run(main()) == ["CST", "MST"]
+
+
+def test_unknown_geocoder():
+    with pytest.raises(ValueError):
+        Decoder(api_key='', geocoder="carrier pigeon")
@@ -0,0 +1,101 @@
+import pytest
+
+from src.dmw_decoder.geocoders import GeocodeResult, Geocoder
+from src.dmw_decoder.issued import IssuedNames, NameCollisionError
+from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.metrics import Metrics
+
+
+class FixedGeocoder(Geocoder):
+    def lookup(self, address):
+        return GeocodeResult("CST", 1.0)
+
+
+def test_issue_same_key_twice():
+    issued = IssuedNames()
+    assert issued.issue("01sCSTweb-01", "01sCSTweb-01") == "01sCSTweb-01"
+    assert issued.issue("01sCSTweb-01", "01sCSTweb-01") == "01sCSTweb-01"
+    assert len(issued) == 1
+    assert issued.owner("01sCSTweb-01") == "01sCSTweb-01"
+
+
+def test_issue_collision():
+    issued = IssuedNames()
+    issued.issue("01sCSTweb-temp1", "01sCSTweb-temp1-a")
+    with pytest.raises(NameCollisionError) as info:
+        issued.issue("01sCSTweb-temp1", "01sCSTweb-temp1-b")
+    assert info.value.owner == "01sCSTweb-temp1-a"
+    assert isinstance(info.value, ValueError)
+
+
+def test_disambiguate():
+    issued = IssuedNames(disambiguate=True)
+    assert issued.issue("01sCSTweb-temp1", "a", reserved=9) == "01sCSTweb-temp1"
+    assert issued.issue("01sCSTweb-temp1", "b", reserved=9) == "01sCSTweb-temp2"
+    assert issued.issue("01sCSTweb-temp1", "c", reserved=9) == "01sCSTweb-temp3"
+    # Asking again returns the name already given, not a new one
+    assert issued.issue("01sCSTweb-temp1", "b", reserved=9) == "01sCSTweb-temp2"
+    assert issued.issue("01sCSTweb", "d", reserved=9) == "01sCSTweb"
+    assert issued.issue("01sCSTweb", "e", reserved=9) == "01sCSTweb2"
+
+
+def test_disambiguate_never_touches_reserved_prefix():
+    issued = IssuedNames(disambiguate=True)
+    prefix = "01sCSTwebapps"
+    names = [issued.issue(prefix + "-0", str(i), reserved=len(prefix)) for i in range(10)]
+    assert len(set(names)) == 10
+    assert all(name.startswith(prefix) and len(name) <= 15 for name in names)
+    with pytest.raises(NameCollisionError):
+        for i in range(10, 200):
+            issued.issue(prefix + "-0", str(i), reserved=len(prefix))
+
+
+def test_persistence(tmp_path):
+    path = tmp_path / "issued.db"
+    first = IssuedNames(path, disambiguate=True)
+    first.issue("01sCSTweb-temp1", "a")
+    first.close()
+    second = IssuedNames(path, disambiguate=True)
+    assert "01sCSTweb-temp1" in second
+    assert second.issue("01sCSTweb-temp1", "b") == "01sCSTweb-temp2"
+    assert second.issue("01sCSTweb-temp1", "a") == "01sCSTweb-temp1"
+    assert len(second) == 2
+
+
+def test_shared_between_processes(tmp_path):
+    path = tmp_path / "issued.db"
+    first = IssuedNames(path)
+    second = IssuedNames(path)
+    first.issue("01sCSTweb-01", "a")
+    with pytest.raises(NameCollisionError):
+        second.issue("01sCSTweb-01", "b")
+
+
+def test_decoder_flags_truncated_collisions(tmp_path):
+    site_csv = tmp_path / "sites.csv"
+    site_csv.write_text('Building Name,Building ID,Address\nHQ,1,"Chicago, IL 60661"\n')
+    metrics = Metrics()
+    decode = Decoder(
+        api_key="",
+        site_csv=site_csv,
+        geocoder=FixedGeocoder(),
+        issued_names=IssuedNames(disambiguate=True),
+        metrics=metrics,
+    )
+    names = [
+        result.name
+        for result in decode.create_names(
+            [
+                ("1", "server", "web", "-temp-fl2-goofy"),
+                ("1", "server", "web", "-temp-fl2-silly"),
+                ("1", "server", "web", "-temp-fl2-goofy"),
+            ]
+        )
+    ]
+    assert names == ["01sCSTweb-temp-", "01sCSTweb-temp2", "01sCSTweb-temp-"]
+    assert metrics.counters["names_disambiguated"] == 1
+
+    decode.issued_names = IssuedNames()
+    decode.create_netbios_compatible_name("1", "server", "web", "-temp-fl2-goofy")
+    with pytest.raises(NameCollisionError):
+        decode.create_netbios_compatible_name("1", "server", "web", "-temp-fl2-silly")
@@ -1,3 +1,5 @@
+import re
+
 import httpx
 import pytest
 from pytest_httpx import HTTPXMock
@@ -265,10 +267,11 @@ def test_read_csv(site_csv):
         }
     }
     decode = Decoder(api_key='', site_csv=site_csv)
-    assert decode.read_csv() == expected_result
+    with pytest.warns(DeprecationWarning):
+        assert decode.read_csv() == expected_result
     bad_filename = "bogus"
     decode_fail = Decoder(api_key='', site_csv=bad_filename)
-    with pytest.raises(FileNotFoundError) as e_char:
+    with pytest.raises(FileNotFoundError) as e_char, pytest.warns(DeprecationWarning):
         decode_fail.read_csv()
     assert e_char.value.strerror == "No such file or directory"
 
@@ -283,3 +286,87 @@ def test_create_netbios_compatible_name(site_csv, httpx_mock: HTTPXMock):
                 }
         decode = Decoder(api_key='', site_csv=site_csv, client=mock_client)
         assert decode.create_netbios_compatible_name(**test_params) == '02vJSTcsr-01-te'
+
+
+def test_create_names(two_site_csv, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        url=re.compile(r".*Adams.*"),
+        json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]},
+    )
+    httpx_mock.add_response(
+        url=re.compile(r".*Tokyo.*"),
+        json={"results": [{"timezone": {"abbreviation_STD": "JST"}, "rank": {"confidence": 1}}]},
+    )
+    with httpx.Client() as mock_client:
+        decode = Decoder(api_key='', site_csv=two_site_csv, client=mock_client)
+        results = decode.create_names([
+            ("1", "server", "web", "-01"),
+            {"building_id": "2", "device_function": "virtualized", "entity": "csr", "component": "-01-temp"},
+            ("01", "app", "db", "-02"),
+            ("33", "server", "web", "-01"),
+            ("1", "network", "core", "-sw01"),
+        ])
+    assert [result.name for result in results] == [
+        "01sCSTweb-01", "02vJSTcsr-01-te", None, None, "01nCSTcore-sw01"
+    ]
+    assert str(results[2].error) == "Name does not meet minimum length"
+    assert isinstance(results[3].error, KeyError)
+    assert [result.ok for result in results] == [True, True, False, False, True]
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_create_names_reports_lookup_failure_per_item(two_site_csv, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(url=re.compile(r".*Adams.*"), status_code=500)
+    httpx_mock.add_response(
+        url=re.compile(r".*Tokyo.*"),
+        json={"results": [{"timezone": {"abbreviation_STD": "JST"}, "rank": {"confidence": 1}}]},
+    )
+    with httpx.Client() as mock_client:
+        decode = Decoder(api_key='', site_csv=two_site_csv, client=mock_client)
+        results = decode.create_names([("1", "server", "web", "-01"), ("2", "server", "web", "-01")])
+    assert isinstance(results[0].error, httpx.HTTPStatusError)
+    assert results[1].name == "02sJSTweb-01"
+
+
+def test_warm_up_names_without_lookups(two_site_csv, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(url=re.compile(r".*Adams.*"), status_code=500)
+    httpx_mock.add_response(
+        url=re.compile(r".*Tokyo.*"),
+        json={"results": [{"timezone": {"abbreviation_STD": "JST"}, "rank": {"confidence": 1}}]},
+    )
+    with httpx.Client() as mock_client:
+        decode = Decoder(api_key='', site_csv=two_site_csv, client=mock_client)
+        assert decode.warm_up() == 1
+        # Warmed names never go back to the registry
+        decode.registry.sites = None
+        assert decode.create_netbios_compatible_name("2", "virtualized", "csr", "-01-temp") == "02vJSTcsr-01-te"
+        assert decode.create_netbios_compatible_name("02", "app", "crm", "-01") == "02aJSTcrm-01"
+        with pytest.raises(ValueError, match="minimum length"):
+            decode.create_netbios_compatible_name("2", "server", "db", "-01")
+        with pytest.raises(ValueError, match="disallowed"):
+            decode.create_netbios_compatible_name("2", "server", "web", "-01?")
+    assert decode.warm_name("2", " Server ", "web", "-01") is None
+    assert decode.warm_name("1", "server", "web", "-01") is None
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_warm_up_is_dropped_when_the_csv_changes(two_site_csv):
+    decode = Decoder(api_key='', site_csv=two_site_csv, geocoder="local")
+    decode.warm_up()
+    with open(two_site_csv, "w") as file:
+        file.write('Building Name,Building ID,Address\nHQ,1,"625 W Adams St, Chicago, IL  60661, United States"\n')
+    assert decode.warm_name("2", "server", "web", "-01") is None
+    with pytest.raises(KeyError, match="not in lookup csv"):
+        decode.create_netbios_compatible_name("2", "server", "web", "-01")
+    assert decode.create_netbios_compatible_name("1", "server", "web", "-01") == "01sCSTweb-01"
+
+
+def test_close_leaves_a_passed_in_client_open():
+    with httpx.Client() as shared:
+        with Decoder(api_key='', client=shared):
+            pass
+        assert not shared.is_closed
+    decode = Decoder(api_key='')
+    own = decode.client
+    decode.close()
+    assert own.is_closed
@@ -0,0 +1,79 @@
+import httpx
+from pytest_httpx import HTTPXMock
+
+from src.dmw_decoder.cache import GeocodeCache
+from src.dmw_decoder.logic import NULL_TIMER, Decoder
+from src.dmw_decoder.metrics import Histogram, Metrics
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.snapshot() == {
+        "count": 4,
+        "sum": 2.65,
+        "buckets": {"0.1": 2, "1.0": 3, "+Inf": 4},
+    }
+
+
+def test_metrics_snapshot_and_prometheus():
+    metrics = Metrics(buckets=(1.0,))
+    metrics.observe("geocode", 0.5)
+    metrics.observe_http(200, 0.25)
+    metrics.increment("cache_hits")
+    metrics.increment("cache_hits")
+    assert metrics.snapshot()["counters"] == {"cache_hits": 2}
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE dmw_decoder_stage_seconds histogram",
+        'dmw_decoder_stage_seconds_bucket{stage="geocode",le="1.0"} 1',
+        'dmw_decoder_stage_seconds_bucket{stage="geocode",le="+Inf"} 1',
+        'dmw_decoder_stage_seconds_sum{stage="geocode"} 0.5',
+        'dmw_decoder_stage_seconds_count{stage="geocode"} 1',
+        "# TYPE dmw_decoder_http_request_seconds histogram",
+        'dmw_decoder_http_request_seconds_bucket{status="200",le="1.0"} 1',
+        'dmw_decoder_http_request_seconds_bucket{status="200",le="+Inf"} 1',
+        'dmw_decoder_http_request_seconds_sum{status="200"} 0.25',
+        'dmw_decoder_http_request_seconds_count{status="200"} 1',
+        "# TYPE dmw_decoder_cache_hits_total counter",
+        "dmw_decoder_cache_hits_total 2",
+    ]
+
+
+def test_metrics_write_textfile(tmp_path):
+    metrics = Metrics()
+    metrics.increment("cache_misses")
+    path = tmp_path / "dmw_decoder.prom"
+    metrics.write_textfile(path)
+    assert "dmw_decoder_cache_misses_total 1" in path.read_text()
+    assert [p.name for p in tmp_path.iterdir()] == ["dmw_decoder.prom"]
+
+
+def test_decoder_records_metrics(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]}
+    )
+    metrics = Metrics()
+    with httpx.Client() as mock_client:
+        decode = Decoder(
+            api_key='',
+            site_csv='src/dmw_decoder/data/Buildings.csv',
+            client=mock_client,
+            cache=GeocodeCache(),
+            metrics=metrics,
+        )
+        decode.create_netbios_compatible_name("1", "server", "web", "-01")
+        decode.create_netbios_compatible_name("1", "server", "web", "-02")
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {"cache_hits": 1, "cache_misses": 1}
+    assert snapshot["http"]["200"]["count"] == 1
+    assert snapshot["stages"]["read_csv"]["count"] == 1
+    assert snapshot["stages"]["geocode"]["count"] == 1
+    assert snapshot["stages"]["json_parse"]["count"] == 1
+    assert snapshot["stages"]["assemble_name"]["count"] == 2
+
+
+def test_decoder_without_metrics_uses_null_timer():
+    decode = Decoder(api_key='')
+    assert decode.timed("geocode") is NULL_TIMER
+    decode.count("cache_hits")
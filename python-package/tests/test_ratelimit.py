@@ -0,0 +1,97 @@
+import threading
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.ratelimit import TokenBucket, retry_after_seconds
+
+
+def test_token_bucket_allows_burst_then_limits(clock):
+    bucket = TokenBucket(rate=10, burst=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now == 0
+    bucket.acquire()
+    assert clock.now == pytest.approx(0.1)
+    bucket.acquire()
+    assert clock.now == pytest.approx(0.2)
+
+
+def test_token_bucket_pause(clock):
+    bucket = TokenBucket(rate=100, burst=5, clock=clock, sleep=clock.sleep)
+    bucket.pause(2)
+    bucket.acquire()
+    assert clock.now == pytest.approx(2)
+
+
+def test_token_bucket_try_acquire(clock):
+    bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now += 0.1
+    assert bucket.try_acquire()
+    bucket.pause(1)
+    clock.now += 0.5
+    assert not bucket.try_acquire()
+
+
+def test_token_bucket_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=0)
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds({"Retry-After": "3"}) == 3
+    assert retry_after_seconds({}, default=1.5) == 1.5
+    assert retry_after_seconds({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+    assert retry_after_seconds({"Retry-After": "soon"}) == 1.0
+
+
+def test_geo_lookup_honours_retry_after(httpx_mock: HTTPXMock, clock):
+    httpx_mock.add_response(status_code=429, headers={"Retry-After": "2"})
+    httpx_mock.add_response(json={"results": []})
+    with httpx.Client() as mock_client:
+        decode = Decoder(
+            api_key="key",
+            client=mock_client,
+            rate_limiter=TokenBucket(rate=5, burst=5, clock=clock, sleep=clock.sleep),
+        )
+        assert decode.geo_lookup_by_address("address") == {"results": []}
+    assert clock.now == pytest.approx(2)
+
+
+def test_geo_lookup_gives_up_after_retries(httpx_mock: HTTPXMock, clock):
+    for _ in range(2):
+        httpx_mock.add_response(status_code=429, headers={"Retry-After": "0"})
+    with httpx.Client() as mock_client:
+        decode = Decoder(
+            api_key="key",
+            client=mock_client,
+            rate_limiter=TokenBucket(rate=5, clock=clock, sleep=clock.sleep),
+            rate_limit_retries=1,
+        )
+        with pytest.raises(httpx.HTTPStatusError):
+            decode.geo_lookup_by_address("address")
+
+
+def test_resolve_timezones_with_thread_pool():
+    threads = set()
+
+    def handler(request):
+        threads.add(threading.get_ident())
+        return httpx.Response(
+            200, json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]}
+        )
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        decode = Decoder(api_key="key", client=client, max_workers=4)
+        addresses = [f"address {i}" for i in range(20)]
+        timezones = decode.resolve_timezones(addresses)
+    assert list(timezones) == addresses
+    assert set(timezones.values()) == {"CST"}
+    assert threading.get_ident() not in threads
@@ -0,0 +1,172 @@
+import os
+
+import pytest
+
+from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.registry import IndexedSites, Site, SiteRegistry, load_sites
+
+
+@pytest.fixture()
+def site_csv(tmp_path):
+    filename = tmp_path / "sites.csv"
+    filename.write_text(
+        'Building Name,Building ID,Address\nHQ,1,"625 W Adams St, Chicago, IL  60661, United States"\n'
+    )
+    return filename
+
+
+def test_registry_loads_once(site_csv):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"01": {"Address": "somewhere"}}
+
+    registry = SiteRegistry(site_csv, loader)
+    assert registry.sites() == {"01": {"Address": "somewhere"}}
+    registry.sites()
+    assert len(calls) == 1
+
+
+def test_registry_reloads_when_file_changes(site_csv):
+    decode = Decoder(api_key="", site_csv=site_csv)
+    assert list(decode.registry.sites()) == ["01"]
+    with open(site_csv, "a") as file:
+        file.write('Denver,22,"206 E 13th Ave, Denver, CO 80203"\n')
+    stat = os.stat(site_csv)
+    os.utime(site_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert list(decode.registry.sites()) == ["01", "22"]
+
+
+def test_registry_missing_file():
+    registry = SiteRegistry("bogus", dict)
+    with pytest.raises(FileNotFoundError):
+        registry.sites()
+
+
+def write_sites(path, count, id_width):
+    with open(path, "w") as file:
+        file.write("Building Name,Building ID,Address\n")
+        for i in range(count):
+            file.write(f'Site {i},{i},"{i} Main St, Springfield, IL 62701"\n')
+    return path
+
+
+def test_site_record():
+    site = Site("1", "HQ", "625 W Adams St")
+    assert site["Address"] == "625 W Adams St"
+    assert site["Building ID"] == "1"
+    with pytest.raises(KeyError):
+        site["Floor"]
+    assert not hasattr(site, "__dict__")
+
+
+def test_load_sites(site_csv):
+    decode = Decoder(api_key="", site_csv=site_csv)
+    assert load_sites(site_csv, decode.normalize_building_id) == {
+        "01": Site("1", "HQ", "625 W Adams St, Chicago, IL  60661, United States")
+    }
+
+
+def test_normalize_building_id_with_wider_ids():
+    decode = Decoder(api_key="", id_width=4)
+    assert decode.normalize_building_id("7") == "0007"
+    assert decode.normalize_building_id("1234") == "1234"
+    with pytest.raises(ValueError):
+        decode.normalize_building_id("10000")
+
+
+def test_indexed_sites(tmp_path):
+    path = write_sites(tmp_path / "sites.csv", 20000, 5)
+    decode = Decoder(api_key="", id_width=5)
+    sites = IndexedSites(path, 5, decode.normalize_building_id)
+    assert len(sites) == 20000
+    assert sites["12345"] == Site("12345", "Site 12345", "12345 Main St, Springfield, IL 62701")
+    assert "00007" in sites
+    assert "20000" not in sites
+    assert list(sites)[:2] == ["00000", "00001"]
+    assert (tmp_path / "sites.csv.idx").exists()
+
+
+def test_indexed_sites_reuses_and_refreshes_index(tmp_path):
+    path = write_sites(tmp_path / "sites.csv", 10, 2)
+    decode = Decoder(api_key="")
+    IndexedSites(path, 2, decode.normalize_building_id)
+    calls = []
+
+    class CountingSites(IndexedSites):
+        def _build_index(self):
+            calls.append(1)
+            return super()._build_index()
+
+    CountingSites(path, 2, decode.normalize_building_id)
+    assert calls == []
+    with open(path, "a") as file:
+        file.write('Late,42,"42 Main St, Springfield, IL 62701"\n')
+    sites = CountingSites(path, 2, decode.normalize_building_id)
+    assert calls == [1]
+    assert sites["42"].name == "Late"
+
+
+def test_indexed_sites_rejects_wide_ids(tmp_path):
+    path = write_sites(tmp_path / "sites.csv", 1, 2)
+    with open(path, "a") as file:
+        file.write('Wide,123,"somewhere"\n')
+    with pytest.raises(ValueError):
+        IndexedSites(path, 2, Decoder(api_key="", id_width=3).normalize_building_id)
+
+
+def test_decoder_with_indexed_sites(tmp_path, httpx_mock):
+    httpx_mock.add_response(
+        json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]}
+    )
+    path = write_sites(tmp_path / "sites.csv", 500, 3)
+    decode = Decoder(api_key="", site_csv=path, id_width=3, indexed_sites=True)
+    assert decode.create_netbios_compatible_name("42", "server", "web", "-01") == "042sCSTweb-01"
+    with pytest.raises(KeyError):
+        decode.create_netbios_compatible_name("999", "server", "web", "-01")
+
+
+def test_load_sites_is_as_forgiving_as_dictreader(tmp_path):
+    path = tmp_path / "sites.csv"
+    normalize = Decoder(api_key="").normalize_building_id
+    # Blank lines are skipped
+    path.write_text('Building Name,Building ID,Address\nHQ,1,"Chicago, IL 60661"\n\n')
+    assert list(load_sites(path, normalize)) == ["01"]
+    # The name column is optional
+    path.write_text('Building ID,Address\n1,"Chicago, IL 60661"\n')
+    assert load_sites(path, normalize) == {"01": Site("1", "", "Chicago, IL 60661")}
+    # Excel exports start with a BOM
+    path.write_bytes('﻿Building ID,Address\n1,"Chicago, IL 60661"\n'.encode("utf-8"))
+    assert load_sites(path, normalize)["01"].address == "Chicago, IL 60661"
+    sites = IndexedSites(path, 2, normalize)
+    assert sites["01"] == Site("1", "", "Chicago, IL 60661")
+
+
+def test_indexed_sites_index_path(tmp_path, caplog):
+    path = write_sites(tmp_path / "sites.csv", 10, 2)
+    index_path = tmp_path / "cache" / "sites.idx"
+    index_path.parent.mkdir()
+    decode = Decoder(
+        api_key="", site_csv=path, indexed_sites=True, sites_index_path=str(index_path)
+    )
+    assert decode.registry.sites()["07"].name == "Site 7"
+    assert index_path.exists()
+    assert not (tmp_path / "sites.csv.idx").exists()
+    IndexedSites(path, 2, decode.normalize_building_id, index_path=str(tmp_path / "missing" / "x.idx"))
+    assert "Could not save the site index" in caplog.text
+
+
+def test_registry_closes_replaced_sites(site_csv):
+    closed = []
+
+    class Sites(dict):
+        def close(self):
+            closed.append(self)
+
+    registry = SiteRegistry(site_csv, Sites)
+    first = registry.sites()
+    with open(site_csv, "a") as file:
+        file.write('Annex,2,"somewhere"\n')
+    assert registry.sites() is not first
+    assert closed == [first]
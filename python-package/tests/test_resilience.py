@@ -0,0 +1,184 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from src.dmw_decoder.async_decoder import AsyncDecoder
+from src.dmw_decoder.cache import GeocodeCache
+from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.metrics import Metrics
+from src.dmw_decoder.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HedgePolicy,
+    RetryPolicy,
+)
+
+GEO_RESPONSE = {
+    "results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]
+}
+
+
+def primed_hedge(latency=0.01):
+    hedge = HedgePolicy(min_samples=1)
+    hedge.observe(latency)
+    return hedge
+
+
+def test_retry_delay_backs_off_with_jitter():
+    retry = RetryPolicy(base_delay=0.5, max_delay=3, jitter=lambda: 1.0)
+    assert [retry.delay(failures) for failures in (1, 2, 3, 4)] == [0.5, 1.0, 2.0, 3]
+    retry.jitter = lambda: 0.25
+    assert retry.delay(2) == 0.25
+
+
+def test_hedge_delay_uses_percentile():
+    hedge = HedgePolicy(percentile=90, min_samples=10, min_delay=0)
+    for i in range(9):
+        hedge.observe(i / 100)
+    assert hedge.delay() is None
+    hedge.observe(0.5)
+    assert hedge.delay() == 0.08
+    with pytest.raises(ValueError):
+        HedgePolicy(percentile=100)
+
+
+def test_circuit_breaker_opens_and_recovers(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    clock.now += 10
+    assert breaker.state == "half_open"
+    # Only one trial call at a time
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_geo_lookup_retries_server_errors(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=503)
+    httpx_mock.add_exception(httpx.ReadTimeout("slow"))
+    httpx_mock.add_response(json=GEO_RESPONSE)
+    metrics = Metrics()
+    with httpx.Client() as client:
+        decode = Decoder(
+            api_key="key",
+            client=client,
+            retry=RetryPolicy(retries=2, base_delay=0),
+            metrics=metrics,
+        )
+        assert decode.geo_lookup_by_address("address") == GEO_RESPONSE
+    assert metrics.counters["request_errors"] == 1
+
+
+def test_geo_lookup_gives_up_after_retry_budget(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=503)
+    httpx_mock.add_response(status_code=502)
+    with httpx.Client() as client:
+        decode = Decoder(
+            api_key="key", client=client, retry=RetryPolicy(retries=1, base_delay=0)
+        )
+        with pytest.raises(httpx.HTTPStatusError):
+            decode.geo_lookup_by_address("address")
+
+
+def test_geo_lookup_passes_timeout():
+    timeouts = []
+
+    def handler(request):
+        timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200, json=GEO_RESPONSE)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        Decoder(api_key="key", client=client, timeout=1.5).geo_lookup_by_address("a")
+    assert timeouts[0]["read"] == 1.5
+
+
+def test_hedged_request_wins():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            time.sleep(0.5)
+        return httpx.Response(200, json=GEO_RESPONSE)
+
+    metrics = Metrics()
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        decode = Decoder(api_key="key", client=client, hedge=primed_hedge(), metrics=metrics)
+        start = time.perf_counter()
+        assert decode.geo_lookup_by_address("address") == GEO_RESPONSE
+        assert time.perf_counter() - start < 0.4
+        decode.close()
+    assert len(calls) == 2
+    assert metrics.counters["hedged_requests"] == 1
+
+
+def test_async_hedged_request_wins():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(0.5)
+        return httpx.Response(200, json=GEO_RESPONSE)
+
+    async def main():
+        async with AsyncDecoder(
+            api_key="key",
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            hedge=primed_hedge(),
+        ) as decode:
+            return await decode.geo_lookup_by_address("address")
+
+    start = time.perf_counter()
+    assert asyncio.run(main()) == GEO_RESPONSE
+    assert time.perf_counter() - start < 0.4
+    assert len(calls) == 2
+
+
+def test_circuit_breaker_serves_stale_timezones(httpx_mock: HTTPXMock, clock):
+    httpx_mock.add_response(status_code=503)
+    cache = GeocodeCache(ttl=10, clock=clock)
+    cache.set("625 W Adams St", "CST")
+    clock.now += 20
+    metrics = Metrics()
+    with httpx.Client() as client:
+        decode = Decoder(
+            api_key="key",
+            client=client,
+            cache=cache,
+            circuit_breaker=CircuitBreaker(failure_threshold=1),
+            metrics=metrics,
+        )
+        assert decode.get_timezone_by_address("625 W Adams St") == "CST"
+        # The circuit is now open, so no further request is made
+        assert decode.get_timezone_by_address("625 W Adams St") == "CST"
+        with pytest.raises(CircuitOpenError):
+            decode.get_timezone_by_address("somewhere else")
+    assert len(httpx_mock.get_requests()) == 1
+    assert metrics.counters["stale_fallbacks"] == 2
+
+
+def test_stale_entries_are_not_served_without_breaker(httpx_mock: HTTPXMock, clock):
+    httpx_mock.add_response(status_code=503)
+    cache = GeocodeCache(ttl=10, clock=clock)
+    cache.set("625 W Adams St", "CST")
+    clock.now += 20
+    assert cache.get("625 W Adams St") is None
+    assert cache.get("625 W Adams St", stale=True) == "CST"
+    with httpx.Client() as client:
+        decode = Decoder(api_key="key", client=client, cache=cache)
+        with pytest.raises(httpx.HTTPStatusError):
+            decode.get_timezone_by_address("625 W Adams St")
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from src.dmw_decoder.cli import main
+from src.dmw_decoder.reverse import NameDecoder, ParsedName
+
+
+def test_parse():
+    decoder = NameDecoder()
+    assert decoder.parse("02vJSTcsr-01-te") == ParsedName(
+        name="02vJSTcsr-01-te",
+        building_id="02",
+        device_function="v",
+        timezone="JST",
+        entity_component="csr-01-te",
+    )
+    assert decoder.parse("15oTBD--seven01").timezone == "TBD"
+
+
+@pytest.mark.parametrize(
+    "name, errors",
+    [
+        ("01sCSTweb|01", ["Name contains disallowed character"]),
+        ("", ["Name does not meet minimum length", "Building ID is not zero padded digits", "Invalid device function"]),
+        ("01sCSTweb-far-too-long", ["Name exceeds maximum length"]),
+        ("1sCSTweb-01", ["Building ID is not zero padded digits", "Invalid device function"]),
+        ("01cCSTweb-01", ["Invalid device function"]),
+        ("01sXYZweb-01", ["Unknown timezone"]),
+        ("01sCSTwe", ["Entity does not meet minimum length"]),
+    ],
+)
+def test_explain(name, errors):
+    decoder = NameDecoder()
+    assert not decoder.is_valid(name)
+    assert decoder.explain(name) == errors
+    with pytest.raises(ValueError):
+        decoder.parse(name)
+
+
+def test_known_buildings_and_timezones():
+    decoder = NameDecoder(timezones=["CST"], building_ids=["01", "22"])
+    assert decoder.is_valid("22sCSTweb-01")
+    assert not decoder.is_valid("22sMSTweb-01")
+    assert decoder.explain("33sCSTweb-01") == ["The value 33 is not in lookup csv."]
+
+
+def test_audit_matches_functional_fixtures():
+    with open("tests/functional_test_permutations.json") as file:
+        names = [name for _, name in json.load(file)]
+    assert list(NameDecoder().audit(names)) == []
+
+
+def test_audit_file(tmp_path):
+    path = tmp_path / "names.txt"
+    path.write_text("01sCSTweb-01\n01sCSTw\n02vJSTcsr-01-te\n")
+    findings = list(NameDecoder().audit_file(path))
+    assert [(f.line_number, f.name) for f in findings] == [(2, "01sCSTw")]
+
+
+def test_audit_cli(tmp_path, capsys):
+    path = tmp_path / "names.txt"
+    path.write_text("01sCSTweb-01\n01sCSTw\n33sCSTweb-01\n")
+    assert main(["audit", str(path), "--check-buildings", "--site-csv", "src/dmw_decoder/data/Buildings.csv"]) == 1
+    captured = capsys.readouterr()
+    findings = [json.loads(line) for line in captured.out.splitlines()]
+    assert [finding["line_number"] for finding in findings] == [2, 3]
+    assert "3 names audited, 2 invalid" in captured.err
@@ -0,0 +1,81 @@
+import json
+
+import httpx
+
+from src.dmw_decoder.cli import main
+from src.dmw_decoder.issued import IssuedNames
+from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.sharded import ShardedNamer
+
+REQUESTS = [
+    ("22", "app", "crm", "-01"),
+    ("1", "server", "x", "-01"),
+    ("abc", "server", "web", "-01"),
+    ("98", "server", "web", "-01"),
+    ("7", "network", "core", "-sw01"),
+    ("1", "server", "web", "-temp-fl2-goofy"),
+    ("1", "server", "web", "-temp-fl2-silly"),
+] * 5
+
+
+def outcomes(results):
+    return [(result.name, None if result.ok else str(result.error)) for result in results]
+
+
+def test_matches_serial_naming():
+    decoder = Decoder(api_key="", geocoder="local")
+    with ShardedNamer(decoder, processes=2) as namer:
+        sharded = namer.create_names(REQUESTS)
+        assert namer.create_names([]) == []
+    assert outcomes(sharded) == outcomes(decoder.create_names(REQUESTS))
+    assert sharded[0].name == "22aMSTcrm-01"
+    assert "not in lookup csv" in str(sharded[3].error)
+
+
+def test_issued_names_are_resolved_in_order():
+    serial = Decoder(api_key="", geocoder="local", issued_names=IssuedNames(disambiguate=True))
+    expected = outcomes(serial.create_names(REQUESTS))
+    decoder = Decoder(api_key="", geocoder="local", issued_names=IssuedNames(disambiguate=True))
+    with ShardedNamer(decoder, processes=2) as namer:
+        assert outcomes(namer.create_names(REQUESTS)) == expected
+    assert expected[5][0] == "01sCSTweb-temp-"
+    assert expected[6][0] == "01sCSTweb-temp2"
+
+
+def test_cli_processes(tmp_path):
+    input_file = tmp_path / "requests.jsonl"
+    input_file.write_text("".join(json.dumps(request) + "\n" for request in REQUESTS[:5]))
+    output_file = tmp_path / "names.jsonl"
+    arguments = ["name", str(input_file), "-o", str(output_file), "--geocoder", "local"]
+    assert main(arguments + ["--processes", "2", "--chunk-size", "2"]) == 1
+    records = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [record["name"] for record in records] == [
+        "22aMSTcrm-01",
+        None,
+        None,
+        None,
+        "07nPSTcore-sw01",
+    ]
+
+
+def test_site_geocode_failure_is_reported_per_item(tmp_path):
+    site_csv = tmp_path / "sites.csv"
+    site_csv.write_text(
+        'Building Name,Building ID,Address\nHQ,1,"Chicago, IL 60661"\nWest,2,"Denver, CO 80202"\n'
+    )
+
+    def handler(request):
+        if "Denver" in str(request.url):
+            return httpx.Response(500)
+        return httpx.Response(
+            200,
+            json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]},
+        )
+
+    requests = [("1", "server", "web", "-01"), ("2", "server", "web", "-01")] * 3
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        decoder = Decoder(api_key="", site_csv=site_csv, client=client)
+        with ShardedNamer(decoder, processes=2) as namer:
+            results = namer.create_names(requests)
+    assert [result.name for result in results] == ["01sCSTweb-01", None] * 3
+    assert all(isinstance(result.error, httpx.HTTPStatusError) for result in results[1::2])
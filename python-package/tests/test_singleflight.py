@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.dmw_decoder.async_decoder import AsyncDecoder
+from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.metrics import Metrics
+from src.dmw_decoder.singleflight import AsyncSingleFlight, SingleFlight
+
+GEO_RESPONSE = {
+    "results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]
+}
+
+
+def run_threads(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "CST"
+
+    threads = run_threads(8, lambda: results.append(flight.do_shared("key", slow)))
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(results) == [("CST", False)] + [("CST", True)] * 7
+    # Nothing is remembered once the call is done
+    assert flight.do("key", lambda: "PST") == "PST"
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise LookupError("down")
+
+    def target():
+        try:
+            flight.do("key", failing)
+        except LookupError as e:
+            errors.append(e)
+
+    threads = run_threads(3, target)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+
+
+def test_decoder_coalesces_lookups_for_one_address():
+    requests = []
+    release = threading.Event()
+
+    def handler(request):
+        requests.append(request)
+        release.wait(5)
+        return httpx.Response(200, json=GEO_RESPONSE)
+
+    metrics = Metrics()
+    decode = Decoder(
+        api_key="", client=httpx.Client(transport=httpx.MockTransport(handler)), metrics=metrics
+    )
+    addresses = ["625 W Adams St, Chicago", " 625 w adams st,chicago "]
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda address=address: results.append(decode.get_timezone_by_address(address))
+        )
+        for address in addresses * 3
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["CST"] * 6
+    assert len(requests) == 1
+    assert metrics.counters["coalesced_lookups"] == 5
+
+
+def test_async_single_flight_survives_cancelled_waiter():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "CST"
+
+        first = asyncio.ensure_future(flight.do("key", slow))
+        second = asyncio.ensure_future(flight.do("key", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "CST"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return calls
+
+    assert asyncio.run(main()) == [1]
+
+
+def test_async_decoder_coalesces_lookups():
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=GEO_RESPONSE)
+
+    async def main():
+        async with AsyncDecoder(
+            api_key="", client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ) as decode:
+            return await asyncio.gather(
+                *(decode.get_timezone_by_address("625 W Adams St") for _ in range(5))
+            )
+
+    assert asyncio.run(main()) == ["CST"] * 5
+    assert len(requests) == 1
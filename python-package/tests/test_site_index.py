@@ -0,0 +1,151 @@
+import re
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from src.dmw_decoder.geocoders import LocalGeocoder
+from src.dmw_decoder.issued import IssuedNames
+from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.site_index import SiteIndex, build_site_index, main, refresh_site_index
+
+
+def test_build_site_index(two_site_csv, timezone_responses):
+    with httpx.Client() as mock_client:
+        decode = Decoder(api_key='', site_csv=two_site_csv, client=mock_client)
+        index, errors = build_site_index(decode)
+    assert errors == {}
+    assert index.sites == {
+        "01": {
+            "address": "625 W Adams St, Chicago, IL  60661, United States",
+            "timezone": "CST",
+            "confidence": 1,
+        },
+        "02": {
+            "address": "2 Chome-5-8 Higashishinagawa, Shinagawa City, Tokyo 140-0002, Japan",
+            "timezone": "TBD",
+            "confidence": 0.3,
+        },
+    }
+
+
+def test_build_site_index_reports_errors(two_site_csv, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(url=re.compile(r".*Adams.*"), status_code=500)
+    httpx_mock.add_response(url=re.compile(r".*Tokyo.*"), json={"results": []})
+    with httpx.Client() as mock_client:
+        decode = Decoder(api_key='', site_csv=two_site_csv, client=mock_client)
+        index, errors = build_site_index(decode)
+    assert len(index) == 0
+    assert isinstance(errors["01"], httpx.HTTPStatusError)
+    assert isinstance(errors["02"], LookupError)
+
+
+def test_site_index_round_trip(tmp_path):
+    path = tmp_path / "site_index.json"
+    index = SiteIndex({"01": {"address": "somewhere", "timezone": "CST", "confidence": 1}})
+    index.save(path)
+    assert SiteIndex.load(path).sites == index.sites
+    path.write_text('{"version": 99, "sites": {}}')
+    with pytest.raises(ValueError):
+        SiteIndex.load(path)
+
+
+def test_decoder_names_from_index_without_network(two_site_csv, httpx_mock: HTTPXMock):
+    index = SiteIndex({
+        "01": {
+            "address": "625 W Adams St, Chicago, IL  60661, United States",
+            "timezone": "CST",
+            "confidence": 1,
+        },
+        "02": {"address": "an old address", "timezone": "PST", "confidence": 1},
+    })
+    httpx_mock.add_response(
+        json={"results": [{"timezone": {"abbreviation_STD": "JST"}, "rank": {"confidence": 1}}]},
+    )
+    with httpx.Client() as mock_client:
+        decode = Decoder(api_key='', site_csv=two_site_csv, client=mock_client, site_index=index)
+        assert decode.create_netbios_compatible_name("1", "server", "web", "-01") == "01sCSTweb-01"
+        assert len(httpx_mock.get_requests()) == 0
+        # The index entry for building 2 no longer matches the CSV address
+        assert decode.create_netbios_compatible_name("2", "server", "web", "-01") == "02sJSTweb-01"
+        assert len(httpx_mock.get_requests()) == 1
+
+
+def test_main_requires_api_key(monkeypatch, tmp_path):
+    monkeypatch.delenv("DMW_DECODER_API_KEY", raising=False)
+    with pytest.raises(SystemExit):
+        main(["--output", str(tmp_path / "index.json")])
+
+
+def test_refresh_only_geocodes_the_diff(tmp_path):
+    site_csv = tmp_path / "sites.csv"
+    site_csv.write_text(
+        "Building Name,Building ID,Address\n"
+        'HQ,1,"Chicago, IL 60661"\n'
+        'West,2,"Denver, CO 80202"\n'
+        'Gone,3,"Springfield, IL 62701"\n'
+    )
+    geocoder = LocalGeocoder()
+    decode = Decoder(api_key="", site_csv=site_csv, geocoder=geocoder)
+    previous, report = refresh_site_index(decode, SiteIndex())
+    assert report.added == ["01", "02", "03"]
+    assert report.geocoded == 3
+
+    issued = IssuedNames()
+    decode.issued_names = issued
+    decode.create_names(
+        [
+            ("2", "server", "web", "-01"),
+            ("2", "app", "crm", "-temp-fl2-goofy"),
+            ("3", "server", "web", "-01"),
+            ("1", "server", "web", "-01"),
+        ]
+    )
+    site_csv.write_text(
+        "Building Name,Building ID,Address\n"
+        'HQ,1,"Chicago, IL 60661"\n'
+        'West,2,"Seattle, WA 98101"\n'
+        'New,4,"Boston, MA 02108"\n'
+    )
+    index, report = refresh_site_index(decode, previous, issued_names=issued)
+    assert (report.added, report.changed, report.removed) == (["04"], ["02"], ["03"])
+    assert report.geocoded == 2
+    assert index.sites["01"] is previous.sites["01"]
+    assert index.sites["02"]["timezone"] == "PST"
+    assert report.timezone_changes == {"02": ("MST", "PST")}
+    assert report.affected_names == {
+        "02aMSTcrm-temp-": "02aPSTcrm-temp-",
+        "02sMSTweb-01": "02sPSTweb-01",
+        "03sCSTweb-01": None,
+    }
+
+
+def test_by_key_prefix_uses_sqlite(tmp_path):
+    issued = IssuedNames(tmp_path / "issued.db")
+    issued.issue("02sMSTweb-01", "02sMSTweb-01")
+    issued.issue("02nMSTcore-01", "02nMSTcore-01")
+    reopened = IssuedNames(tmp_path / "issued.db")
+    assert reopened.by_key_prefix("02sMST") == [("02sMSTweb-01", "02sMSTweb-01")]
+    assert reopened.by_key_prefix("02sPST") == []
+
+
+def test_main_refresh(two_site_csv, tmp_path, capsys, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        json={"results": [{"timezone": {"abbreviation_STD": "CST"}, "rank": {"confidence": 1}}]},
+    )
+    output = tmp_path / "index.json"
+    SiteIndex({
+        "01": {"address": "somewhere else", "timezone": "MST", "confidence": 1},
+        "02": {
+            "address": "2 Chome-5-8 Higashishinagawa, Shinagawa City, Tokyo 140-0002, Japan",
+            "timezone": "TBD",
+            "confidence": 0.3,
+        },
+    }).save(output)
+    arguments = ["--site-csv", str(two_site_csv), "--output", str(output), "--api-key", "x"]
+    assert main(arguments + ["--refresh"]) == 0
+    err = capsys.readouterr().err
+    assert "0 added, 1 changed, 0 removed, 1 geocoded" in err
+    assert "Building 01 timezone MST -> CST" in err
+    assert len(httpx_mock.get_requests()) == 1
+    assert SiteIndex.load(output).sites["01"]["timezone"] == "CST"
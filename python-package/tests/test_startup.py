@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+
+from src.dmw_decoder.logic import Decoder
+
+PROBE = """
+import json, sys
+import dmw_decoder
+decoder = dmw_decoder.Decoder(api_key="")
+print(json.dumps({"modules": sorted(sys.modules)}))
+"""
+
+
+def test_import_does_not_load_httpx():
+    src = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+    env = dict(os.environ, PYTHONPATH=src)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    modules = json.loads(output)["modules"]
+    assert "httpx" not in modules
+    assert "asyncio" not in modules
+
+
+def test_client_created_on_first_use():
+    decode = Decoder(api_key='')
+    assert decode._client is None
+    assert isinstance(decode.client, httpx.Client)
+    assert decode.client is decode.client
+    decode.close()
+
+
+def test_client_passed_in_is_used():
+    with httpx.Client() as client:
+        with Decoder(api_key='', client=client) as decode:
+            assert decode.client is client
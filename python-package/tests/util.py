@@ -1,15 +1,17 @@
+import argparse
 import itertools
 import json
 import os
 import sys
-import time
 
 from dotenv import load_dotenv
 
 current = os.path.dirname(os.path.realpath(__file__))
 parent = os.path.dirname(current)
 sys.path.append(parent)
+from src.dmw_decoder.cache import GeocodeCache
 from src.dmw_decoder.logic import Decoder
+from src.dmw_decoder.ratelimit import TokenBucket
 
 '''
 This "utility" creates all permutations for valid system names
@@ -17,39 +19,139 @@ and saves them in to a json file for easier loading via pytest's
 parametrize
 **Note** This expects the output of the script to be the source
 of truth for testing. If introduced bugs cause bad values, these
-tests may not fail properly and lead to bad test results. 
-'''
+tests may not fail properly and lead to bad test results.
 
-load_dotenv()
+Every building is geocoded once, in parallel, and the answers are kept
+in a SQLite cache next to this file, so a refresh after the first one
+makes no API calls at all. Use --verify to check the existing file
+instead of rewriting it.
+'''
 
-api_key = os.getenv("GEOAPIFY")
+DEFAULT_SITE_CSV = os.path.join(parent, "src", "dmw_decoder", "data", "Buildings.csv")
+DEFAULT_OUTPUT = os.path.join(current, "functional_test_permutations.json")
+DEFAULT_CACHE = os.path.join(current, ".fixture_geocode.sqlite")
 
 buildings = ["1", "22", "7", "15", "53", "82", "2", "9"]
 device_functions = ["server", "network", "virtualized", "app", "other"]
 entity = ["--3", "four", "-five", "---six", "--seven"]
 component = ["-01", "01-temp-fl2-goofy"]
 
-all_permutations = list(
-    itertools.product(buildings, device_functions, entity, component, [api_key])
-)
-everything = []
-for i, tup in enumerate(all_permutations):
-    total_permutations = len(all_permutations)
-    single_test_data = ()
-    params = {
-        "building_id": tup[0],
-        "device_function": tup[1],
-        "entity": tup[2],
-        "component": tup[3]
+
+def all_permutations() -> list:
+    return [
+        {
+            "building_id": building_id,
+            "device_function": device_function,
+            "entity": entity_name,
+            "component": component_name,
+        }
+        for building_id, device_function, entity_name, component_name in itertools.product(
+            buildings, device_functions, entity, component
+        )
+    ]
+
+
+def resolve_buildings(decoder: Decoder) -> dict:
+    # The only slow part: one geocode per building, spread over the
+    # decoder's workers. Answers land in the decoder's cache, so naming
+    # the permutations afterwards never goes back to the network.
+    sites = decoder.registry.sites()
+    addresses = {
+        building_id: decoder.get_address_by_building_id(sites, building_id)
+        for building_id in buildings
+    }
+    timezones = decoder.resolve_timezones(set(addresses.values()))
+    return {
+        building_id: timezones[address]
+        for building_id, address in addresses.items()
+        if isinstance(timezones[address], Exception)
     }
-    decode = Decoder(api_key=api_key, site_csv='tests/Buildings.csv')
-    output = decode.create_netbios_compatible_name(**params)
-    single_test_data = (params, output)
-    everything.append(single_test_data)
-    time.sleep(0.05)
-    print(f'Item {i} of {total_permutations}')
 
-json_object = json.dumps(everything)
 
-with open("tests/functional_test_permutations.json", "w") as outfile:
-    outfile.write(json_object)
+def generate(decoder: Decoder):
+    for params in all_permutations():
+        yield params, decoder.create_netbios_compatible_name(**params)
+
+
+def write_fixtures(decoder: Decoder, output: str) -> int:
+    # Written out record by record to a temporary file that only replaces
+    # the fixture once it is complete, in the same layout json.dumps uses
+    temporary_output = f"{output}.{os.getpid()}.tmp"
+    count = 0
+    try:
+        with open(temporary_output, "w") as outfile:
+            outfile.write("[")
+            for record in generate(decoder):
+                if count:
+                    outfile.write(", ")
+                outfile.write(json.dumps(record))
+                count += 1
+            outfile.write("]")
+        os.replace(temporary_output, output)
+    finally:
+        if os.path.exists(temporary_output):
+            os.remove(temporary_output)
+    return count
+
+
+def verify_fixtures(decoder: Decoder, output: str) -> list:
+    with open(output) as file:
+        expected = json.load(file)
+    problems = []
+    if len(expected) != len(all_permutations()):
+        problems.append(
+            f"{output} has {len(expected)} permutations, expected {len(all_permutations())}"
+        )
+    for i, (params, name) in enumerate(generate(decoder)):
+        if i >= len(expected):
+            break
+        expected_params, expected_name = expected[i]
+        if expected_params != params:
+            problems.append(f"Item {i} is {expected_params}, expected {params}")
+        elif expected_name != name:
+            problems.append(f"Item {i} {params} is {expected_name}, now {name}")
+    return problems
+
+
+def main(argv=None) -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Regenerate or verify the functional test fixtures")
+    parser.add_argument("--verify", action="store_true", help="check the fixture file, do not write it")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--site-csv", default=DEFAULT_SITE_CSV)
+    parser.add_argument(
+        "--cache",
+        default=DEFAULT_CACHE,
+        help="SQLite geocode cache kept between runs (':memory:' to always geocode)",
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5, help="geoapify requests per second")
+    parser.add_argument("--api-key", default=os.getenv("GEOAPIFY"))
+    args = parser.parse_args(argv)
+
+    decoder = Decoder(
+        api_key=args.api_key or "",
+        site_csv=args.site_csv,
+        cache=GeocodeCache(args.cache),
+        rate_limiter=TokenBucket(rate=args.rate, burst=max(1, int(args.rate))),
+        max_workers=args.workers,
+    )
+    with decoder:
+        errors = resolve_buildings(decoder)
+        for building_id, error in errors.items():
+            print(f"Building {building_id} could not be geocoded: {error}", file=sys.stderr)
+        if errors:
+            return 1
+        if args.verify:
+            problems = verify_fixtures(decoder, args.output)
+            for problem in problems:
+                print(problem, file=sys.stderr)
+            print(f"{args.output}: {len(problems)} problems")
+            return 1 if problems else 0
+        count = write_fixtures(decoder, args.output)
+    print(f"Wrote {count} permutations to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())